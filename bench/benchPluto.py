@@ -0,0 +1,153 @@
+"""
+    Benchmarks of the PlutoSdr hot paths
+    Runs against the simulated backend, whose latency and throughput
+    model the link, reporting time, samples/s, round trips and the peak
+    memory allocated for each operation. Results are saved as json to
+    compare between releases.
+        python -m bench.benchPluto --out bench_results.json
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import logging
+import time
+import tracemalloc
+
+import numpy as np
+
+from pluto import readFilter
+from pluto.pluto_sdr import PlutoSdr
+from pluto.pluto_fir import FirConfig
+from pluto.version import __version__
+
+SIM_ID = 'sim:latency=0.0002,throughput=40e6'   # a USB link, roughly
+BLOCK = 0x10000                                  # samples per block
+FTR_FILE = 'test/LTE1p4_MHz'
+
+def measure(name, fn, repeat, ctx, samples=0):
+    """time repeat calls of fn, with round trips and memory per call"""
+    fn()                                  # warm up, e.g. caches
+    # only the sim counts round trips, None for a device
+    trips = getattr(ctx, 'round_trips', None)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start)/repeat
+    if trips is not None:
+        trips = (ctx.round_trips - trips)/repeat
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    ans = {'name':name, 'repeat':repeat, 'time_us':elapsed*1e6,
+           'round_trips':trips, 'alloc_bytes':peak}
+    if samples:
+        ans['samples_per_s'] = samples/elapsed
+        ans['alloc_per_raw'] = peak/(4.0*samples)   # raw IQ is 4 bytes
+    return ans
+
+def benchRx(sdr, repeat):
+    ctx = sdr.ctx
+    raw = sdr.readRx(BLOCK)
+    out = np.empty(BLOCK, sdr.complex_type)
+    stream = sdr.rxStream(BLOCK)
+    ans = [measure('readRx raw', lambda: sdr.readRx(BLOCK), repeat, ctx,
+                   BLOCK),
+           measure('readRx complex', lambda: sdr.readRx(BLOCK, raw=False),
+                   repeat, ctx, BLOCK),
+           measure('rxStream raw', lambda: next(stream), repeat, ctx, BLOCK),
+           measure('raw2complex', lambda: sdr.raw2complex(raw), repeat, ctx,
+                   BLOCK),
+           measure('raw2complex out', lambda: sdr.raw2complex(raw, out),
+                   repeat, ctx, BLOCK)]
+    stream.close()
+    return ans
+
+def benchTx(sdr, repeat):
+    ctx = sdr.ctx
+    iq = np.exp(2j*np.pi*np.arange(BLOCK)/64)
+    staging = np.empty(2*BLOCK, np.int16)
+    sdr.writeTx(iq)
+    ans = [measure('complex2raw', lambda: sdr.complex2raw(iq, 16), repeat,
+                   ctx, BLOCK),
+           measure('stageTx', lambda: sdr.stageTx(iq, staging), repeat, ctx,
+                   BLOCK),
+           measure('writeTx', lambda: sdr.writeTx(iq), repeat, ctx, BLOCK),
+           measure('updateTx', lambda: sdr.updateTx(iq), repeat, ctx, BLOCK)]
+    sdr.writeTx(None)
+    return ans
+
+def benchFir(sdr, repeat):
+    ctx = sdr.ctx
+    fir = FirConfig(sdr.phy)
+    taps = readFilter.readFilter(FTR_FILE)
+    def parse():
+        readFilter.clearCache()
+        readFilter.readFilter(FTR_FILE)
+    return [measure('FirConfig.writeRx', lambda: fir.writeRx(taps['rx_taps']),
+                    repeat, ctx),
+            measure('FirConfig.writeRx diff',
+                    lambda: fir.writeRx(taps['rx_taps'], diff=True),
+                    repeat, ctx),
+            measure('FirConfig.readRx', lambda: fir.readRx(refresh=True),
+                    repeat, ctx),
+            measure('FirConfig.readRx cached', fir.readRx, repeat, ctx),
+            measure('readFilter parse', parse, repeat, ctx),
+            measure('readFilter cached',
+                    lambda: readFilter.readFilter(FTR_FILE), repeat, ctx)]
+
+def benchProperties(sdr, repeat, label):
+    ctx = sdr.ctx
+    def setAll():
+        sdr.rx_lo_freq = 430.1
+        sdr.rx_bandwidth = 5
+        sdr.rx_gain = 30
+    def getAll():
+        return (sdr.sampling_frequency, sdr.rx_lo_freq, sdr.rx_bandwidth,
+                sdr.rx_gain, sdr.rx_decimation)
+    return [measure('setters'+label, setAll, repeat, ctx),
+            measure('getters'+label, getAll, repeat, ctx),
+            measure('configure'+label,
+                    lambda: sdr.configure(rx_lo=430.1, rx_bw=5, rx_gain=30),
+                    repeat, ctx),
+            measure('capture'+label, lambda: sdr.capture(BLOCK, raw=True),
+                    repeat, ctx, BLOCK)]
+
+def run(uri=SIM_ID, repeat=20):
+    """run all the benchmarks, return the results in a dict"""
+    sdr = PlutoSdr(uri)
+    results = benchRx(sdr, repeat) + benchTx(sdr, repeat) \
+              + benchFir(sdr, max(1, repeat//10)) \
+              + benchProperties(sdr, repeat, '') \
+              + benchProperties(PlutoSdr(uri, cache=True), repeat, ' cached')
+    return {'version':__version__, 'uri':uri, 'block':BLOCK,
+            'date':time.strftime('%Y-%m-%dT%H:%M:%S'), 'results':results}
+
+def show(ans):
+    print('PlutoSdr {:s} benchmarks on {:s}'.format(ans['version'], ans['uri']))
+    print('{:26s}{:>12s}{:>10s}{:>12s}{:>10s}'\
+          .format('', 'time us', 'trips', 'MS/s', 'alloc/raw'))
+    for res in ans['results']:
+        print('{:26s}{:12.1f}{:>10s}{:>12s}{:>10s}'.format(res['name'],
+              res['time_us'],
+              '{:.1f}'.format(res['round_trips'])
+                         if res['round_trips'] is not None else 'n/a',
+              '{:.2f}'.format(res['samples_per_s']/1e6)
+                         if 'samples_per_s' in res else '-',
+              '{:.2f}'.format(res['alloc_per_raw'])
+                         if 'alloc_per_raw' in res else '-'))
+
+if __name__=='__main__':
+    parser = argparse.ArgumentParser(description='PlutoSdr benchmarks')
+    parser.add_argument('--uri', default=SIM_ID, help='device or sim: uri')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='calls timed for each operation')
+    parser.add_argument('--out', help='json file for the results')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    ans = run(args.uri, args.repeat)
+    show(ans)
+    if args.out:
+        with open(args.out, 'w') as fout:
+            json.dump(ans, fout, indent=1)
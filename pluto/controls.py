@@ -23,6 +23,11 @@ OFF = False
 import numpy
 FLOAT = numpy.float64       # keep 2:1 proportion so that np.view() performs
 COMPLEX = numpy.complex128  # a fast in place conversion of interleaved IQ
+# single precision halves the memory traffic of converted rx data
+FLOAT32 = numpy.float32
+COMPLEX64 = numpy.complex64
+# the float type viewed as each complex type, keeping the 2:1 proportion
+FLOAT_OF = {COMPLEX:FLOAT, COMPLEX64:FLOAT32}
 
 def devFind(ctx, name):
     """find an iio_device by name or raise and exception"""
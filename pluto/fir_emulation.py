@@ -0,0 +1,103 @@
+"""
+    Software emulation of the AD9361 rx and tx FIR filters
+    Applies the int16 taps from an ftr file, or read back by FirConfig,
+    to numpy sample streams with the gain and the decimation or
+    interpolation of the hardware, for trying filters on captures
+    without a device.  Filtering is by overlap-save FFT convolution of
+    all the segments of a block together, with the input history and
+    decimation phase carried over so blocks can be of any size.
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+from __future__ import print_function
+
+import logging
+
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pluto import readFilter
+
+COEFF_SCALE = 2**-15       # taps are 1.15 fixed point
+MIN_FFT = 256
+
+def _fftSize(no_taps):
+    """a power of 2 several times the filter length"""
+    return max(MIN_FFT, 1<<int(np.ceil(np.log2(4*no_taps))))
+
+class FirEmulator(object):
+    """the fir with int16 taps, gain in dB and a factor for decimation,
+       or interpolation when interpolate, as done by the AD9361"""
+    def __init__(self, taps, factor=1, gain=0, interpolate=False):
+        taps = np.trim_zeros(np.asarray(taps, np.int16), 'b')
+        self.factor = factor
+        self.interpolate = interpolate
+        # gains are in 6dB steps, which the hardware does by shifting
+        self.scale = COEFF_SCALE*2**(gain/6.0)
+        self.no_taps = len(taps)
+        self.nfft = _fftSize(self.no_taps)
+        self.step = self.nfft - self.no_taps + 1       # outputs per segment
+        self._response = np.fft.fft(taps*self.scale, self.nfft)
+        self.reset()
+
+    @classmethod
+    def fromFilter(cls, ftr, trx='rx'):
+        """the rx or tx fir of an ftr file name or the dict from readFilter"""
+        if not isinstance(ftr, dict):
+            ftr = readFilter.readFilter(ftr)
+        trx = trx.lower()
+        if trx=='rx':
+            return cls(ftr['rx_taps'], ftr['rx_DEC'], ftr['rx_GAIN'])
+        elif trx=='tx':
+            return cls(ftr['tx_taps'], ftr['tx_INT'], ftr['tx_GAIN'], True)
+        else:
+            raise ValueError('unknown signal path must be tx or rx')
+
+    def reset(self):
+        """start again with no input history"""
+        self._history = np.zeros(self.no_taps - 1, np.complex128)
+        self._phase = 0           # of the next output within the decimation
+
+    def _filter(self, x):
+        """the full rate filter output for each sample of x"""
+        if len(x)==0:             # no segment to filter, history unaltered
+            return np.empty(0, np.complex128)
+        n = len(self._history)
+        no_segs = -(-len(x)//self.step)
+        data = np.zeros(n + no_segs*self.step, np.complex128)
+        data[:n] = self._history
+        data[n:n + len(x)] = x
+        segs = sliding_window_view(data, self.nfft)[::self.step]
+        spectra = np.fft.fft(segs, axis=1)
+        spectra *= self._response
+        y = np.fft.ifft(spectra, axis=1)[:, n:].ravel()[:len(x)]
+        self._history = data[len(x):len(x) + n].copy()
+        return y
+
+    def process(self, x):
+        """filter a block of complex samples, returned as complex128
+           decimated output lengths vary with the phase carried over"""
+        x = np.asarray(x)
+        if self.interpolate:      # zeros between the samples
+            up = np.zeros(len(x)*self.factor, np.complex128)
+            up[::self.factor] = x
+            return self._filter(up)
+        y = self._filter(x)[self._phase::self.factor]
+        self._phase = (self._phase - len(x)) % self.factor
+        logging.debug('fir: {:d} outputs'.format(len(y)))
+        return y
+
+    def processRaw(self, raw):
+        """filter a block of interleaved int16 IQ, returned as the same"""
+        y = self.process(raw[0::2] + 1j*raw[1::2])
+        iq = np.rint(y.view(np.float64))
+        return np.clip(iq, -2**15, 2**15 - 1).astype(np.int16)
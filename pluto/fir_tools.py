@@ -17,16 +17,41 @@
 """
 from __future__ import print_function
 
-from scipy import signal as sig
+import logging
+
+from functools import lru_cache
+
+import numpy as np
+# scipy and matplotlib are slow to import, so are imported when first used
 
 PASS_TYPES = ('LPF', 'HPF', 'BPF')
 PLOT_COLOURS = ('b', 'r')
 
+TAP_MULTIPLE = 16          # the AD9361 firs have 16 to 128 taps in 16s
+MAX_TAPS = 128
+COEFF_SCALE = 2**15        # taps are 1.15 fixed point
+NO_FREQS = 512             # response points from 0 to nyquist
+CACHE_SIZE = 64            # designs held, least recently used discarded
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _firwin(n, cutoff, window, pass_zero):
+    """firwin designs are cached, read only as they are shared"""
+    from scipy import signal as sig
+    ans = sig.firwin(n, cutoff, window=window, pass_zero=pass_zero)
+    ans.flags.writeable = False
+    return ans
+
+def _cutoff(cutoff):
+    """a cutoff or band edges in a form the caches can hold"""
+    if np.ndim(cutoff)==0:
+        return float(cutoff)
+    return tuple(float(f) for f in np.ravel(cutoff))
+
 def lpf(n, cutoff, window='hamming'):
-    return sig.firwin(n, cutoff, window=window)
+    return _firwin(n, _cutoff(cutoff), window, True).copy()
     
 def hpf(n, cutoff, window='hanning'):
-    return sig.firwin(n, cutoff, window=window, pass_zero=False)
+    return _firwin(n, _cutoff(cutoff), window, False).copy()
 
 def bpf(n, lower_cutoff, upper_cutoff, window='blackmanharris'):
     a1 = lpf(n, lower_cutoff, window)
@@ -35,34 +60,116 @@ def bpf(n, lower_cutoff, upper_cutoff, window='blackmanharris'):
     return -(a1 + a2)
 
 
+def legalTaps(n):
+    """n rounded up to a number of taps the AD9361 firs accept"""
+    no_taps = max(TAP_MULTIPLE, -(-n//TAP_MULTIPLE)*TAP_MULTIPLE)
+    if no_taps>MAX_TAPS:
+        raise ValueError('at most {:d} taps'.format(MAX_TAPS))
+    return no_taps
+
+def quantise(taps, gain=1.0):
+    """int16 taps for FirConfig from float taps, times gain"""
+    ans = np.rint(np.asarray(taps)*gain*COEFF_SCALE)
+    if np.abs(ans).max()>COEFF_SCALE - 1:
+        raise ValueError('taps exceed the int16 range, reduce the gain')
+    return ans.astype(np.int16)
+
+MIN_DB = -200.0            # floor for the magnitude of a response zero
+
+@lru_cache(maxsize=None)
+def freqGrid(no_freqs=NO_FREQS):
+    """the no_freqs + 1 normalised frequencies from 0 to 1, nyquist"""
+    ans = np.linspace(0, 1, no_freqs + 1)
+    ans.flags.writeable = False       # shared by all the responses
+    return ans
+
+def response(taps, no_freqs=NO_FREQS):
+    """the complex response on freqGrid(no_freqs) of each row of taps
+       int16 taps are scaled from 1.15 fixed point, all the rows are
+       transformed together"""
+    taps = np.asarray(taps)
+    if taps.dtype==np.int16:
+        taps = taps/COEFF_SCALE
+    # transform length a multiple of the grid, at least the taps length
+    step = max(1, -(-taps.shape[-1]//(2*no_freqs)))
+    ans = np.fft.rfft(taps, 2*no_freqs*step, axis=-1)
+    return ans[..., ::step]
+
+def freqResponse(taps, no_freqs=NO_FREQS):
+    """(freqs, magnitude in dB, unwrapped phase in rads) of the taps,
+       one response for each row of a 2-D tap set, no plotting"""
+    h = response(taps, no_freqs)
+    mag = 20*np.log10(np.maximum(np.abs(h), 10**(MIN_DB/20)))
+    return freqGrid(no_freqs), mag, np.unwrap(np.angle(h), axis=-1)
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _design(pass_type, no_taps, cutoff, window, gain):
+    # odd lengths, padded to no_taps, so hpf and bpf need no zero at nyquist
+    n = no_taps if pass_type=='LPF' else no_taps - 1
+    h = np.zeros(no_taps)
+    h[:n] = _firwin(n, cutoff, window, pass_type=='LPF')
+    ans = {'pass_type':pass_type, 'cutoff':cutoff, 'window':window,
+           'gain':gain, 'taps':quantise(h, gain)}
+    ans['freqs'] = freqGrid()
+    ans['response'] = response(ans['taps'])
+    for key in ('taps', 'response'):
+        ans[key].flags.writeable = False
+    logging.debug('designed {:s} {:d} taps'.format(pass_type, no_taps))
+    return ans
+
+def design(pass_type, n, cutoff, window='hamming', gain=1.0):
+    """a fir ready for FirConfig.writeRx() or writeTx() in a dict
+       pass_type LPF, HPF or BPF with cutoff as a fraction of nyquist,
+       a pair for BPF, n is rounded up to a legal number of taps and
+       gain, e.g. the decimation, scales taps quantised to int16
+       the response is at freqs from 0 to 1, nyquist, for the int16
+       taps, designs are cached and their arrays read only"""
+    pass_type = pass_type.upper()
+    if not pass_type in PASS_TYPES:
+        raise ValueError('unknown: filter type ' + pass_type)
+    return dict(_design(pass_type, legalTaps(n), _cutoff(cutoff), window,
+                        gain))
+
+def clearCache():
+    """discard the cached designs"""
+    _design.cache_clear()
+    _firwin.cache_clear()
+
 def fir_taps(pass_type, n, cutoff, window):
     if not pass_types.upper() in PASS_TYPES:
         print('unknown: filter type ' + pass_type)
         return
     pass
 
-from matplotlib import pyplot as plt
-import numpy as np
-
-def fir_plot(b, a=1, grid=True, phase=False):
-    """plot magnitude in dB and optionally phase together"""
-    w, h = sig.freqz(b, a)
-    w_norm = w/max(w)
+def fir_plot(b, a=1, grid=True, phase=False, show=True):
+    """plot magnitude in dB and optionally phase together
+       b may be a 2-D set of taps, one response plotted for each row
+       return the figure, with show False it is left to the caller"""
+    from matplotlib import pyplot as plt
+    if np.isscalar(a) and a==1:     # fir, computed by freqResponse()
+        w_norm, mag, rads = freqResponse(b)
+    else:
+        from scipy import signal as sig
+        w, h = sig.freqz(b, a)
+        w_norm = w/max(w)
+        mag = 20*np.log10(np.abs(h))
+        rads = np.unwrap(np.angle(h))
     fig = plt.figure()
     ax1 = fig.add_subplot(111)
-    plt.plot(w_norm, 20*np.log10(np.abs(h)), PLOT_COLOURS[0])
+    plt.plot(w_norm, np.atleast_2d(mag).T, PLOT_COLOURS[0])
     plt.title('FIR Frequency Response')
     plt.xlabel('Normalised Frequency [rads/sample]')
     plt.ylabel('Amplidude [dB]', color=PLOT_COLOURS[0])
     if phase:
         ax2 = ax1.twinx()
-        rads = np.unwrap(np.angle(h))
-        plt.plot(w_norm, rads, PLOT_COLOURS[1])
+        plt.plot(w_norm, np.atleast_2d(rads).T, PLOT_COLOURS[1])
         plt.ylabel('Phase [rads/sample]', color=PLOT_COLOURS[1])
     if grid:
         plt.grid()
     #plt.axis('tight')
-    plt.show()
+    if show:
+        plt.show()
+    return fig
 
 if __name__=='__main__':
     pass
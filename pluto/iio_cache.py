@@ -0,0 +1,57 @@
+"""
+    Read-through cache of iio attribute values
+    Each attribute read or written is a round trip to the iiod server,
+    when enabled values are held locally until invalidated or, with a
+    ttl, until they are older than ttl seconds.
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+import logging
+import time
+
+class AttrCache(object):
+    """attribute values keyed by the iio attr instance
+       disabled, all reads and writes go directly to the device"""
+    def __init__(self, enabled=False, ttl=None):
+        self.enabled = enabled
+        self.ttl = ttl               # None holds values until invalidated
+        self._values = {}
+
+    def read(self, attr):
+        """return the attr value, from the cache if held and still valid"""
+        if self.enabled:
+            held = self._values.get(attr)
+            if held is not None and \
+               (self.ttl is None or time.monotonic() - held[1] < self.ttl):
+                return held[0]
+        value = attr.value
+        if self.enabled:
+            self._values[attr] = (value, time.monotonic())
+        return value
+
+    def write(self, attr, value):
+        """write the attr value through to the device
+           the firmware may alter the value, e.g. to the nearest it can
+           set, so the next read is from the device"""
+        attr.value = value
+        self._values.pop(attr, None)
+
+    def invalidate(self, attr=None):
+        """discard the value held for attr, or all values"""
+        if attr is None:
+            self.clear()
+        else:
+            self._values.pop(attr, None)
+
+    def clear(self):
+        """discard all the values held"""
+        logging.debug('attr cache cleared')
+        self._values.clear()
@@ -0,0 +1,139 @@
+"""
+    Process wide registry of iio contexts shared by uri
+    Creating a context is slow, it resolves the host and reads the whole
+    device tree, so contexts are created once and reference counted for
+    PlutoSdr, Dds, FirConfig and the iio_tools.  The mDNS resolution of
+    .local host names is cached and a context that fails its health
+    check is reconnected when it is next requested.
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+from __future__ import print_function
+
+import logging
+import socket
+import threading
+import time
+
+from pluto import iio_sim
+
+PLUTO_ID = 'ip:pluto.local'
+IP_PREFIX = 'ip:'
+MDNS_DOMAIN = '.local'
+RESOLVE_TTL = 300.0       # seconds an mDNS address is reused
+HEALTH_ATTR = 'rx_path_rates'   # ad9361-phy attribute read as a check
+
+_lock = threading.Lock()
+_contexts = {}            # uri: _Entry
+_resolved = {}            # host: (address, time resolved)
+
+class _Entry(object):
+    """a shared context, its users and a lock held while connecting"""
+    def __init__(self):
+        self.ctx = None
+        self.refs = 0
+        self.lock = threading.Lock()
+
+def backend(uri):
+    """the module providing Context and Buffer for the uri"""
+    if iio_sim.isSimUri(uri):
+        return iio_sim
+    try:                  # imported when first needed, it loads libiio
+        import iio
+    except ImportError:
+        raise ImportError('the iio module is required for ' + uri)
+    return iio
+
+def resolveUri(uri):
+    """the uri with a .local host replaced by its address
+       mDNS lookups are slow so the address is cached for RESOLVE_TTL"""
+    if not uri.startswith(IP_PREFIX) or not uri.endswith(MDNS_DOMAIN):
+        return uri
+    host = uri[len(IP_PREFIX):]
+    address, when = _resolved.get(host, (None, 0))
+    if address is None or time.monotonic() - when>RESOLVE_TTL:
+        try:
+            address = socket.gethostbyname(host)
+        except OSError:
+            logging.debug('unresolved ' + host + ', left to libiio')
+            return uri
+        _resolved[host] = (address, time.monotonic())
+    return IP_PREFIX + address
+
+def isHealthy(ctx):
+    """True if the device answers an attribute read"""
+    try:
+        ctx.find_device('ad9361-phy').attrs[HEALTH_ATTR].value
+    except (OSError, AttributeError, KeyError):
+        return False
+    return True
+
+def _connect(uri):
+    try:
+        ctx = backend(uri).Context(resolveUri(uri))
+    except OSError as e:
+        raise OSError('no iio device context found at ' + uri + ': ' + str(e))
+    if ctx is None:
+        raise OSError('no iio device context found at ' + uri)
+    logging.debug('created context for ' + uri)
+    return ctx
+
+def getContext(uri=PLUTO_ID, check=False):
+    """the shared context for uri, adding a reference to it
+       with check, one that fails its health check is reconnected"""
+    with _lock:
+        entry = _contexts.setdefault(uri, _Entry())
+        entry.refs += 1
+    try:
+        with entry.lock:              # other uris connect in parallel
+            if entry.ctx is not None and check and not isHealthy(entry.ctx):
+                logging.info('reconnecting to ' + uri)
+                entry.ctx = None
+            if entry.ctx is None:
+                entry.ctx = _connect(uri)
+            return entry.ctx
+    except Exception:
+        releaseContext(uri)
+        raise
+
+def releaseContext(uri, keep=True):
+    """remove a reference to the context for uri
+       unless keep, the context is discarded when no longer used, the
+       registry is locked throughout so getContext() cannot take a
+       reference to an entry as it is deleted"""
+    with _lock:
+        entry = _contexts.get(uri)
+        if entry is None:
+            return
+        entry.refs = max(0, entry.refs - 1)
+        if entry.refs==0 and not keep:
+            del _contexts[uri]
+
+def reconnect(uri):
+    """discard the context for uri, the next getContext() connects again"""
+    with _lock:
+        entry = _contexts.get(uri)
+    if entry is not None:
+        with entry.lock:
+            entry.ctx = None
+
+def refCount(uri):
+    """the number of users of the context for uri"""
+    with _lock:
+        entry = _contexts.get(uri)
+        return 0 if entry is None else entry.refs
+
+def clearContexts():
+    """discard contexts that are not in use, and the resolved addresses"""
+    with _lock:
+        for uri in [k for k, v in _contexts.items() if v.refs==0]:
+            del _contexts[uri]
+        _resolved.clear()
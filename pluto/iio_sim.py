@@ -0,0 +1,393 @@
+"""
+    Simulated iio backend emulating the devices of an ADALM Pluto
+    Provides Context, Device, Channel and Buffer classes with the same
+    interface as the iio python bindings so that PlutoSdr, Dds and
+    FirConfig can be exercised and benchmarked without hardware.
+    Per-call latency and buffer throughput model USB or network links.
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+from __future__ import print_function
+
+import errno
+import logging
+import time
+
+import numpy as np
+
+SIM_PREFIX = 'sim:'
+# defaults give an instantaneous device, uri options alter them e.g.
+# 'sim:latency=0.002,throughput=20e6' for ~2ms per call and 20MB/s
+DEFAULT_LATENCY = 0.0       # seconds per attribute or register access
+DEFAULT_THROUGHPUT = 0.0    # bytes/sec for buffer transfers, 0 is unlimited
+
+FS_MIN = 2083333            # sampling frequency limits in Hz
+FS_MAX = 61440000
+LO_MIN = 70000000           # LO frequency limits in Hz
+LO_MAX = 6000000000
+LO_REF = 40000000           # RF synth reference, Hz
+LO_MODULUS = 8388593        # fractional-N modulus of the RF synth
+VCO_MIN = 6000000000        # the VCO is divided by 2, 4 .. down to the LO
+
+def isSimUri(uri):
+    """true if the uri selects the simulated backend"""
+    return isinstance(uri, str) and uri.startswith(SIM_PREFIX)
+
+def parseUri(uri):
+    """return dict of the options given as sim:key=value,key=value"""
+    options = {}
+    for item in uri[len(SIM_PREFIX):].split(','):
+        if '=' in item:
+            k, v = item.split('=', 1)
+            options[k.strip()] = float(v)
+    return options
+
+def quantLo(value):
+    """the LO frequency in Hz given by the fractional-N RF synth, which
+       truncates on read back as ad9361_calc_rfpll_freq()"""
+    div = 2
+    while value*div<VCO_MIN:
+        div *= 2
+    fract = (value*div*LO_MODULUS + LO_REF//2)//LO_REF
+    return (fract*LO_REF)//(LO_MODULUS*div)
+
+class _Attr(object):
+    """string valued attribute with optional get/set functions"""
+    def __init__(self, ctx, name, value='', getter=None, setter=None):
+        self._ctx = ctx
+        self.name = name
+        self._value = value
+        self._getter = getter
+        self._setter = setter
+
+    def _get_value(self):
+        self._ctx._roundTrip()
+        if self._getter is None:
+            return self._value
+        return self._getter()
+
+    def _set_value(self, value):
+        self._ctx._roundTrip()
+        self._ctx.attr_writes += 1
+        if self._setter is None:
+            self._value = str(value)
+        else:
+            self._setter(str(value))
+    value = property(_get_value, _set_value)
+
+class Channel(object):
+    def __init__(self, dev, ch_id, output, name=None):
+        self.device = dev
+        self.id = ch_id
+        self.name = name
+        self.output = output
+        self.enabled = False        # local state, as in libiio
+        self.attrs = {}
+
+    def _addAttr(self, name, value='', getter=None, setter=None):
+        self.attrs[name] = _Attr(self.device.ctx, name, value, getter, setter)
+
+class Device(object):
+    def __init__(self, ctx, name, dev_id):
+        self.ctx = ctx
+        self.name = name
+        self.id = dev_id
+        self.channels = []
+        self.attrs = {}
+        self.debug_attrs = {}
+        self._regs = {}
+
+    def _addChannel(self, ch_id, output, name=None):
+        ch = Channel(self, ch_id, output, name)
+        self.channels.append(ch)
+        return ch
+
+    def find_channel(self, name_or_id, is_output=False):
+        """match id or name, preferring the direction given"""
+        found = [ch for ch in self.channels
+                 if name_or_id in (ch.id, ch.name)]
+        for ch in found:
+            if ch.output==is_output:
+                return ch
+        return found[0] if found else None
+
+    def reg_read(self, reg):
+        self.ctx._roundTrip()
+        return self._regRead(reg)
+
+    def reg_write(self, reg, value):
+        self.ctx._roundTrip()
+        self._regWrite(reg, int(value) & 0xFF)
+
+    def _regRead(self, reg):
+        return self._regs.get(reg, 0)
+
+    def _regWrite(self, reg, value):
+        self._regs[reg] = value
+
+class _PhyDevice(Device):
+    """ad9361-phy with the fir coefficient registers emulated"""
+    # (coeff addr, write lsb, read lsb, config) register for tx and rx
+    FIR_REGS = {'tx': (0x60, 0x61, 0x63, 0x65),
+                'rx': (0xF0, 0xF1, 0xF3, 0xF5)}
+
+    def __init__(self, ctx, name, dev_id):
+        Device.__init__(self, ctx, name, dev_id)
+        self.coeffs = {'tx': np.zeros(128, np.int16),
+                       'rx': np.zeros(128, np.int16)}
+
+    def _regRead(self, reg):
+        for trx, (addr, _, read, _) in self.FIR_REGS.items():
+            if reg in (read, read+1):
+                value = int(self.coeffs[trx][self._regs.get(addr, 0) & 0x7F])
+                return (value >> 8*(reg - read)) & 0xFF
+        return Device._regRead(self, reg)
+
+    def _regWrite(self, reg, value):
+        Device._regWrite(self, reg, value)
+        for trx, (addr, write, _, config) in self.FIR_REGS.items():
+            # write strobe with clock <1> and write <2> set
+            if reg==config and (value & 0x06)==0x06:
+                coeff = (self._regs.get(write+1, 0)<<8) \
+                        + self._regs.get(write, 0)
+                self.coeffs[trx][self._regs.get(addr, 0) & 0x7F] = \
+                        np.uint16(coeff).view(np.int16)
+
+class Buffer(object):
+    """emulation of an iio buffer of interleaved 16 bit samples"""
+    def __init__(self, device, samples_count, cyclic=False):
+        self._dev = device
+        self._ctx = device.ctx
+        self._ctx._roundTrip()
+        enabled = [ch for ch in device.channels if ch.enabled]
+        if len(enabled)==0 or samples_count<=0:
+            raise OSError(errno.EINVAL, 'invalid buffer configuration')
+        self._samples_count = samples_count
+        self._length = samples_count*len(enabled)*2
+        self._cyclic = cyclic
+        self._pushed = False
+        self._data = bytearray(self._length)
+        if not device.channels[0].output:
+            self._data = self._ctx._rxData(samples_count, len(enabled))
+
+    def __len__(self):
+        return self._length
+
+    def refill(self):
+        if self._dev.channels[0].output:
+            raise OSError(errno.EBADF, 'refill on an output buffer')
+        self._ctx._roundTrip()
+        self._ctx._transfer(self._length)
+
+    def read(self):
+        return bytearray(self._data)     # a copy, as from the device
+
+    def write(self, data):
+        data = memoryview(data).cast('B')
+        count = min(len(data), self._length)
+        self._data[:count] = data[:count]
+        return count
+
+    def push(self, samples_count=None):
+        if self._cyclic and self._pushed:
+            raise OSError(errno.EBUSY, 'cyclic buffer already pushed')
+        self._ctx._roundTrip()
+        self._ctx._transfer(self._length)
+        self._pushed = True
+        self._ctx.tx_pushed += 1
+
+class Context(object):
+    """simulated context holding the three pluto devices"""
+    def __init__(self, uri=SIM_PREFIX):
+        options = parseUri(uri)
+        self.latency = options.get('latency', DEFAULT_LATENCY)
+        self.throughput = options.get('throughput', DEFAULT_THROUGHPUT)
+        self.name = 'sim'
+        self.description = 'simulated ADALM-PLUTO ' + uri
+        self.attrs = {}
+        self.round_trips = 0
+        self.tx_pushed = 0
+        self.attr_writes = 0
+        self._rx_data = {}
+        self._fs = 30720000
+        self._rf_fs = [self._fs, self._fs]         # adc, dac output rates
+        self.devices = [self._phy(), self._adc(), self._dac()]
+        logging.debug('created ' + self.description)
+
+    def find_device(self, name):
+        for dev in self.devices:
+            if name in (dev.name, dev.id):
+                return dev
+        return None
+
+    # -------------------- latency and throughput ----------------------
+    def _roundTrip(self):
+        self.round_trips += 1
+        if self.latency>0:
+            time.sleep(self.latency)
+
+    def _transfer(self, no_bytes):
+        if self.throughput>0:
+            time.sleep(no_bytes/self.throughput)
+
+    def _rxData(self, no_samples, no_channels):
+        """interleaved int16 test signal, a tone at fs/16 plus noise
+           made once for each size so as not to load benchmarks"""
+        key = (no_samples, no_channels)
+        if key not in self._rx_data:
+            self._rx_data[key] = self._makeRxData(no_samples, no_channels)
+        return self._rx_data[key]
+
+    def _makeRxData(self, no_samples, no_channels):
+        nn = np.arange(no_samples)
+        tone = 0.5*np.exp(2j*np.pi*nn/16)
+        noise = np.random.default_rng(0).normal(0, 0.01, (no_samples, 2))
+        iq = np.empty((no_samples, no_channels))
+        iq[:, 0::2] = (tone.real + noise[:, 0])[:, None]
+        iq[:, 1::2] = (tone.imag + noise[:, 1])[:, None]
+        return np.round(iq*2**11).astype(np.int16).ravel()
+
+    # ---------------------- shared state helpers ----------------------
+    def _getFs(self):
+        return str(self._fs)
+
+    def _setFs(self, value):
+        fs = int(value)
+        if fs<FS_MIN or fs>FS_MAX:
+            raise OSError(errno.EINVAL, 'sampling frequency out of range')
+        self._fs = fs
+        self._rf_fs = [fs, fs]
+
+    def _available(self):
+        return '{:d} {:d}'.format(self._fs, self._fs//8)
+
+    def _getRfFs(self, idx):
+        return lambda: str(self._rf_fs[idx])
+
+    def _setRfFs(self, idx):
+        def setter(value):
+            if int(value) not in (self._fs, self._fs//8):
+                raise OSError(errno.EINVAL, 'unavailable sampling frequency')
+            self._rf_fs[idx] = int(value)
+        return setter
+
+    def _pathRates(self, trx):
+        fs = self._fs
+        names = ('BBPLL', 'ADC', 'R2', 'R1', 'RF', 'RXSAMP') if trx=='rx' \
+                else ('BBPLL', 'DAC', 'T2', 'T1', 'TF', 'TXSAMP')
+        values = (fs*32, fs*2, fs*2, fs, fs, fs)
+        return ' '.join('{:s}:{:d}'.format(n, v) for n, v in zip(names, values))
+
+    def _loAttr(self, ch):
+        state = {'value': 2400000000}
+        def setter(value):
+            f = int(value)
+            if f<LO_MIN or f>LO_MAX:
+                raise OSError(errno.EINVAL, 'LO frequency out of range')
+            state['value'] = quantLo(f)
+        ch._addAttr('frequency', getter=lambda: str(state['value']),
+                    setter=setter)
+
+    # ------------------------- device models --------------------------
+    def _phy(self):
+        phy = _PhyDevice(self, 'ad9361-phy', 'iio:device0')
+        phy.attrs['rx_path_rates'] = _Attr(self, 'rx_path_rates',
+                                    getter=lambda: self._pathRates('rx'))
+        phy.attrs['tx_path_rates'] = _Attr(self, 'tx_path_rates',
+                                    getter=lambda: self._pathRates('tx'))
+        phy.attrs['filter_fir_config'] = _Attr(self, 'filter_fir_config',
+                                    setter=lambda v: self._loadFir(phy, v))
+        phy.attrs['calib_mode_available'] = _Attr(self,
+                 'calib_mode_available', 'auto manual manual_tx_quad tx_quad')
+        phy.debug_attrs['loopback'] = _Attr(self, 'loopback', '0')
+        rx = phy._addChannel('voltage0', False)
+        tx = phy._addChannel('voltage0', True)
+        for ch, bw, gain in ((rx, 18000000, '71.000000 dB'),
+                             (tx, 18000000, '-10.000000 dB')):
+            ch._addAttr('sampling_frequency', getter=self._getFs,
+                        setter=self._setFs)
+            ch._addAttr('rf_bandwidth', str(bw))
+            ch._addAttr('hardwaregain', gain)
+            ch._addAttr('rssi', '89.25 dB')
+        rx._addAttr('gain_control_mode', 'slow_attack')
+        rx._addAttr('gain_control_mode_available',
+                    'manual fast_attack slow_attack hybrid')
+        self._loAttr(phy._addChannel('altvoltage0', True, 'RX_LO'))
+        self._loAttr(phy._addChannel('altvoltage1', True, 'TX_LO'))
+        out = phy._addChannel('out', False)
+        out._addAttr('voltage_filter_fir_en', '0')
+        return phy
+
+    def _adc(self):
+        adc = Device(self, 'cf-ad9361-lpc', 'iio:device3')
+        for ch_id in ('voltage0', 'voltage1'):
+            ch = adc._addChannel(ch_id, False)
+            ch._addAttr('sampling_frequency', getter=self._getRfFs(0),
+                        setter=self._setRfFs(0))
+            ch._addAttr('sampling_frequency_available',
+                        getter=self._available)
+        return adc
+
+    def _dac(self):
+        dac = Device(self, 'cf-ad9361-dds-core-lpc', 'iio:device2')
+        for ch_id in ('voltage0', 'voltage1'):
+            ch = dac._addChannel(ch_id, True)
+            ch._addAttr('sampling_frequency', getter=self._getRfFs(1),
+                        setter=self._setRfFs(1))
+            ch._addAttr('sampling_frequency_available',
+                        getter=self._available)
+        for idx, name in enumerate(('TX1_I_F1', 'TX1_I_F2',
+                                    'TX1_Q_F1', 'TX1_Q_F2')):
+            self._ddsChannel(dac._addChannel('altvoltage'+str(idx),
+                                             True, name))
+        return dac
+
+    def _ddsChannel(self, ch):
+        """dds tone with the frequency, phase and scale quantisation of
+           the axi dds firmware, a 16 bit phase increment and offset and
+           a 1.14 fixed point scale, following cf_axi_dds.c the frequency
+           is truncated, the phase rounded, and the scale rounded when
+           written but truncated when read"""
+        state = {'incr': 0, 'init': 0, 'scale': 0}
+        def setFreq(value):
+            f = int(value)
+            if f<0 or f>self._rf_fs[1]//2:
+                raise OSError(errno.EINVAL, 'dds frequency out of range')
+            state['incr'] = (f*0xFFFF)//self._rf_fs[1]
+        def getFreq():
+            return str((state['incr']*self._rf_fs[1])//0xFFFF)
+        def setPhase(value):
+            phi = int(value)
+            if phi<0 or phi>360000:
+                raise OSError(errno.EINVAL, 'dds phase out of range')
+            state['init'] = ((phi*0x10000 + 180000)//360000) & 0xFFFF
+        def getPhase():
+            return str((state['init']*360000 + 0x8000)//0x10000)
+        ch._addAttr('frequency', getter=getFreq, setter=setFreq)
+        ch._addAttr('phase', getter=getPhase, setter=setPhase)
+        def setScale(value):
+            state['scale'] = (int(round(float(value)*1e6))*0x4000
+                              + 500000)//1000000
+        def getScale():
+            micro = (state['scale']*1000000)//0x4000
+            return '{:d}.{:06d}'.format(micro//1000000, micro % 1000000)
+        ch._addAttr('raw', '0')
+        ch._addAttr('scale', getter=getScale, setter=setScale)
+        ch._addAttr('sampling_frequency', getter=self._getRfFs(1))
+
+    def _loadFir(self, phy, text):
+        """load the tap columns of an ftr file into the coeff memory"""
+        taps = [line.split(',') for line in text.splitlines()
+                if ',' in line and not line.startswith('#')]
+        for trx, col in (('rx', 0), ('tx', 1)):
+            values = np.zeros(128, np.int16)
+            values[:len(taps)] = [int(t[col]) for t in taps]
+            phy.coeffs[trx][:] = values
@@ -20,10 +20,11 @@
 """
 from __future__ import print_function
 
-import iio
+# iio is imported when first used, not to slow down importing pluto
 
 def iioFind(iio_item, name):
     """locate and return the named item from that given"""
+    import iio
     if iio_item is None:
         raise NameError('device '+name+' not found')
     if isinstance(iio_item, iio.Context):
@@ -35,6 +36,7 @@ def iioFind(iio_item, name):
 
 def iioList(item):
     """show information on the iio_class instance given"""
+    import iio
     # info is appropriate for the class supplied
     if isinstance(item, iio.Context):
         print(listContext(item))
@@ -111,20 +113,21 @@ def listChannel(item):
            .format(idx, name, attrs, io)
     
 if __name__=='__main__':
-    from pluto_sdr import PlutoSdr
-    pp = PlutoSdr()
-    iioList(pp.ctx)   # a context
-    iioList(pp.dds)   # a device
-    iioList(pp.ctx.devices)  # device list
-    iioList(pp.dds.channels[0])  # a channel
-    cc0 = pp.dds.channels[0]
+    from pluto.iio_context import getContext, PLUTO_ID
+    ctx = getContext(PLUTO_ID)   # shared with any PlutoSdr in the process
+    dds = ctx.find_device('cf-ad9361-dds-core-lpc')
+    iioList(ctx)   # a context
+    iioList(dds)   # a device
+    iioList(ctx.devices)  # device list
+    iioList(dds.channels[0])  # a channel
+    cc0 = dds.channels[0]
     catt = cc0.attrs['phase']    # ChannelAttr
-    iioList(pp.dds.channels)     # a channel list
+    iioList(dds.channels)     # a channel list
 
-    dd1 = pp.ctx.devices[1]
+    dd1 = ctx.devices[1]
     datt = dd1.attrs['calib_mode_available']  # device DebugAttr
     ddatt = dd1.debug_attrs['digital_tune']
-    cc = pp.dds.channels
+    cc = dds.channels
 
     #iioList(dd1.attrs)
     #iioList(dd1.debug_attrs)
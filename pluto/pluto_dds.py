@@ -17,28 +17,104 @@
 from __future__ import print_function
 
 import logging
+import threading
+import time
 
 from math import copysign, log10
+
+import numpy as np
 from pluto import iio_lambdas as iiol
 from pluto.controls import ON, OFF
 
+# the axi dds firmware holds a 16 bit phase increment and phase offset
+# the quantisation follows cf_axi_dds_read_raw() and cf_axi_dds_write_raw()
+# in drivers/iio/frequency/cf_axi_dds.c of the ADI linux kernel
+FREQ_STEPS = 0xFFFF        # phase increment for a frequency of fs
+PHASE_STEPS = 0x10000      # phase offset steps in 360 degs
+MDEG_360 = 360000          # phase attribute is in milli degrees
+SCALE_STEPS = 0x4000       # scale is a 1.14 fixed point magnitude
+MICRO = 1000000            # scale attribute is read in micro units
+
+def quantFreq(value, fs):
+    """frequency str in Hz as set by the firmware for fs in Hz,
+       do_div() truncates both when written and read back"""
+    incr = (int(value)*FREQ_STEPS)//fs
+    return str((incr*fs)//FREQ_STEPS)
+
+def quantPhase(value):
+    """phase str in milli degs as set by the firmware, rounded both
+       when written and read back, 360 degs is 0"""
+    offset = ((int(value)*PHASE_STEPS + MDEG_360//2)//MDEG_360) % PHASE_STEPS
+    return str((offset*MDEG_360 + PHASE_STEPS//2)//PHASE_STEPS)
+
+def quantScale(value):
+    """scale str as set by the firmware, rounded when written by
+       cf_axi_dds_to_signed_mag_fmt() and truncated when read back"""
+    steps = (int(round(float(value)*MICRO))*SCALE_STEPS + MICRO//2)//MICRO
+    micro = (steps*MICRO)//SCALE_STEPS
+    return '{:d}.{:06d}'.format(micro//MICRO, micro % MICRO)
+
 class DdsTone(object):
+    """a dds tone, values written are held locally with the quantisation
+       of the firmware so that reading them back is only done by verify()"""
     def __init__(self, owner, name):
         self.i_ch = owner.find_channel('TX1_I_'+ name)
         self.q_ch = owner.find_channel('TX1_Q_'+ name)
-        self.amplitude = 0   # initially off
+        self._fs = None      # sampling freq in Hz, read when first needed
+        self._held = {}      # (channel, attr): value str held by the device
+        self._plan = None    # list collecting writes instead of making them
         self._freq = 0
         self._phase = 0
+        self.amplitude = 0   # initially off
+
+    def invalidate(self):
+        """forget the values held, after fs or other programs change them"""
+        self._fs = None
+        self._held.clear()
+
+    def _value(self, ch, attr):
+        """the value str held by the device, read only if not known"""
+        key = (ch, attr)
+        if key not in self._held:
+            self._held[key] = ch.attrs[attr].value
+        return self._held[key]
+
+    def _write(self, attr, i_value, q_value, quant):
+        """write the I and Q values, skipping any the device already holds
+           when planning, the writes are added to the plan to make later"""
+        for ch, value in ((self.i_ch, i_value), (self.q_ch, q_value)):
+            actual = quant(value)
+            if self._held.get((ch, attr))!=actual:
+                if self._plan is None:
+                    ch.attrs[attr].value = value
+                else:
+                    self._plan.append((ch.attrs[attr], value))
+                self._held[(ch, attr)] = actual
+
+    def verify(self):
+        """read back the values from the device, True if as expected"""
+        self._fs = None
+        ok = True
+        for ch, attr in list(self._held.keys()):
+            value = ch.attrs[attr].value
+            if value!=self._held[(ch, attr)]:
+                logging.warning('{:s} {:s}: expected {:s} read {:s}'.format(
+                                ch.id, attr, self._held[(ch, attr)], value))
+                self._held[(ch, attr)] = value
+                ok = False
+        return ok
 
     def getSamplingFreq(self):
         """convenience function for testing the valid range for setFreq"""
-        return iiol._Str2M(self.i_ch.attrs['sampling_frequency'].value)
+        if self._fs is None:
+            self._fs = int(self.i_ch.attrs['sampling_frequency'].value)
+        return self._fs/1e6
 
     def getFreq(self):
         """get the actual frequency set in MHz with I/Q phase giving +/-"""
         i_phase = self.getPhase()
         q_phase = self.getPhase('Q')
-        f = iiol._Str2M(self.i_ch.attrs['frequency'].value)
+        f = iiol._Str2M(self._value(self.i_ch, 'frequency'))
         if iiol._PNorm(i_phase - q_phase)<180:
             return f
         else:
@@ -47,12 +123,12 @@ class DdsTone(object):
     def setFreq(self, f):
         """set to approximately the frequency given in MHz"""
         # approx because the actual freq is constrained by the algorithm
-        # read back from the device to determine the actual value set
-        self._freq = f
+        # which is repeated here to hold the actual value set
         # must be 0 <= f < fs/2
         if abs(f)>self.getSamplingFreq()/2:
             half_fs = '{:2.3f}'.format(self.getSamplingFreq()/2)
             raise ValueError('frequency not within +/-Fs/2 i.e '+half_fs+'MHz')
+        self._freq = f
         # for positive frequencies phase(Q) = phase(I) - 90
         # for negative frequencies abs(f) and phase(Q) = phase(I) + 90
         logging.debug('freq:>' + iiol._M2Str(f))
@@ -60,20 +136,22 @@ class DdsTone(object):
         self.__setPhase()
 
     def __setFreq(self):
-        self.i_ch.attrs['frequency'].value = iiol._M2Str(abs(self._freq))
-        # read back the actual value
-        self._freq = copysign(self.getFreq(), self._freq)
-        logging.debug('i_ch:< '+iiol._M2Str(abs(self._freq))) 
-        self.q_ch.attrs['frequency'].value = iiol._M2Str(abs(self._freq))
-        logging.debug('q_ch:< '+iiol._M2Str(abs(self._freq))) 
+        value = iiol._M2Str(abs(self._freq))
+        self.getSamplingFreq()
+        self._write('frequency', value, value,
+                    lambda v: quantFreq(v, self._fs))
+        # the actual value
+        f = iiol._Str2M(self._held[(self.i_ch, 'frequency')])
+        self._freq = copysign(f, self._freq)
+        logging.debug('i_ch, q_ch:< '+iiol._M2Str(f))
     frequency = property(getFreq, setFreq)
 
     def getPhase(self, ch='I'):
         """get the actual phase set in degs"""
         if ch.upper()=='I':
-            return iiol._Str2P(self.i_ch.attrs['phase'].value)
+            return iiol._Str2P(self._value(self.i_ch, 'phase'))
         else:
-            return iiol._Str2P(self.q_ch.attrs['phase'].value)
+            return iiol._Str2P(self._value(self.q_ch, 'phase'))
 
     def setPhase(self, phi):
         """set the phase given in degrees"""
@@ -82,21 +160,20 @@ class DdsTone(object):
         logging.debug('phase:> ' + str(int(round(phi,3)*1000))+'->'+
                       str(int(round(self._phase,3)*1000)))
         self.__setPhase()
-        self.__setFreq()
 
     def __setPhase(self):
-        self.i_ch.attrs['phase'].value = iiol._P2Str(self._phase)
-        # read back the actual value
-        self._phase = self.getPhase()
-        logging.debug('i_ch:< '+iiol._P2Str(self._phase))
-        ph2 = iiol._PNorm(self._phase - copysign(90, self._freq))
-        self.q_ch.attrs['phase'].value = iiol._P2Str(ph2)
-        logging.debug('q_ch:< '+iiol._P2Str(ph2))
+        # Q follows the actual I phase
+        ph1 = iiol._Str2P(quantPhase(iiol._P2Str(self._phase)))
+        ph2 = iiol._PNorm(ph1 - copysign(90, self._freq))
+        self._write('phase', iiol._P2Str(self._phase), iiol._P2Str(ph2),
+                    quantPhase)
+        self._phase = ph1
+        logging.debug('i_ch, q_ch:< '+iiol._P2Str(ph1)+', '+iiol._P2Str(ph2))
     phase = property(getPhase, setPhase)
 
     def getAmplitude(self):
         """get the actual amplitude set in dBs"""
-        return iiol._Str2A(self.i_ch.attrs['scale'].value)
+        return iiol._Str2A(self._value(self.i_ch, 'scale'))
 
     def setAmplitude(self, amp):
         """set the amplitude given with  0 <= amp <= 1"""
@@ -106,9 +183,9 @@ class DdsTone(object):
         self._setAmplitude(amp)
 
     def _setAmplitude(self, amp):
-        logging.debug('amp:>'+'{:1.6f}'.format(round(amp,6)))
-        self.i_ch.attrs['scale'].value = '{:1.6f}'.format(round(amp,6))
-        self.q_ch.attrs['scale'].value = '{:1.6f}'.format(round(amp,6))
+        value = '{:1.6f}'.format(round(amp,6))
+        logging.debug('amp:>'+value)
+        self._write('scale', value, value, quantScale)
     amplitude = property(getAmplitude, setAmplitude)
 
  ##   def state(self, value):
@@ -155,6 +232,15 @@ class Dds(object):
         """return the sampling freq in MHz. Read only"""
         return self.t1.getSamplingFreq()
 
+    def invalidate(self):
+        """forget the tone values held, e.g. after a sampling freq change"""
+        self.t1.invalidate()
+        self.t2.invalidate()
+
+    def verify(self):
+        """read back both tones, True if the device holds the values set"""
+        return self.t1.verify() & self.t2.verify()
+
     def setAmplitude(self, amp1, amp2=None):
         """set amplitude of the tones in dB, deprecated, default None turns off """
         # now use state(value) to turn on/off
@@ -177,7 +263,7 @@ class Dds(object):
     def setPhase(self, ph1, ph2=None):
         self.t1.setPhase(ph1)
         if ph2 is not None:
-            self.t2.setphase(ph2)
+            self.t2.setPhase(ph2)
 
     def state(self, value):
         """set on/off state for both DDS tones"""
@@ -189,6 +275,30 @@ class Dds(object):
             else:
                 ch.attrs['raw'].value = '1'
 
+    def _planStep(self, f1, f2, amp, phase):
+        """the attribute writes for a step, updating the tones as if made"""
+        writes = []
+        for tone, f, a, ph in zip((self.t1, self.t2), (f1, f2),
+                                  _pair(amp), _pair(phase)):
+            tone._plan = writes
+            try:
+                if f is not None:
+                    tone.setFreq(f)
+                if ph is not None:
+                    tone.setPhase(ph)
+                if a is not None:
+                    if a>0:
+                        raise ValueError('tone amplitudes set in -dB levels')
+                    tone.amplitude = 10**(a/10.0)
+            finally:
+                tone._plan = None
+        return writes
+
+    def schedule(self, steps):
+        """write steps of (time, f1, f2, amp, phase) from a thread
+           return the running DdsSchedule, see DdsSchedule"""
+        return DdsSchedule(self, steps).start()
+
     def isOff(self):
         return self.channels[0].attrs['raw'].value=='0' # only test 1
     
@@ -197,13 +307,85 @@ class Dds(object):
         amp = 99.9 if tone.amplitude==0 else tone.amplitude
         return (tone.frequency, 'MHz', tone.phase, 10*log10(amp),'dBFS')
 
+def _pair(value):
+    """a value for each tone, from one for both or a pair"""
+    if isinstance(value, (tuple, list)):
+        return value
+    return (value, value)
+
+SPIN_TIME = 0.002          # secs before a step when sleeping stops
+
+class DdsSchedule(object):
+    """steps of (time, f1, f2, amp, phase) written to the dds tones
+       time is in secs from the start, f1 and f2 in MHz for each tone,
+       amp in dBFS and phase in degs for both tones or as a pair,
+       and None leaves a value unaltered
+       all the attribute writes are formatted and checked beforehand,
+       the lateness of each step is measured in jitter"""
+    def __init__(self, dds, steps):
+        self.dds = dds
+        steps = sorted(steps, key=lambda step: step[0])
+        try:
+            self.plan = [(t, dds._planStep(f1, f2, amp, phase))
+                         for t, f1, f2, amp, phase in steps]
+        except Exception:
+            dds.invalidate()        # the tones no longer match the device
+            raise
+        self.jitter = np.full(len(self.plan), np.nan)   # secs late
+        self.done = 0
+        self.error = None
+        self._running = False
+        self._thread = None
+
+    def _run(self):
+        try:
+            start = time.perf_counter()
+            for k, (t, writes) in enumerate(self.plan):
+                due = start + t
+                delay = due - time.perf_counter()
+                while delay>0 and self._running:
+                    time.sleep(max(0, delay - SPIN_TIME))  # then spin
+                    delay = due - time.perf_counter()
+                if not self._running:
+                    break
+                self.jitter[k] = time.perf_counter() - due
+                for attr, value in writes:
+                    attr.value = value
+                self.done = k + 1
+        except Exception as err:
+            logging.error('dds schedule stopped: ' + str(err))
+            self.error = err
+        finally:
+            self._running = False
+            if self.done<len(self.plan):
+                self.dds.invalidate()
+
+    def start(self):
+        """start writing the steps in the background"""
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout=None):
+        """wait for all the steps, raise any error"""
+        self._thread.join(timeout)
+        if self.error is not None:
+            raise self.error
+
+    def stop(self):
+        """stop before the last step"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+
 if __name__=='__main__':
     import sys
-    import iio
+    from pluto.iio_context import getContext
     logging.basicConfig(format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
                         stream=sys.stdout, level=logging.DEBUG)
     try:
-        ctx = iio.Context('ip:pluto.local')
+        ctx = getContext()
         dds = ctx.find_device('cf-ad9361-dds-core-lpc')
         t1 = DdsTone(dds, 'F1')
     except:
@@ -15,7 +15,6 @@
  * Lesser General Public License for more details.
 """
 from __future__ import print_function
-from rsdLib.fileUtils import changeExt
 
 # SPI control register locations
 TX_COEFF_ADDR = 0x60     # read/write from/to this coeff offset
@@ -29,6 +28,11 @@ RX_READ_REG   = 0xF3     # this is lsb, with usb at 0xF4
 RX_FIR_CONFIG = 0xF5     # see rxConfig()
 RX_FIR_GAIN   = 0xF6     # <1:0> filter gain
 
+NO_SLOTS = 128           # coefficient memory size for each path
+PUSH_COEFFS = 0xFE       # config value to write a coeff, see pushCoeffs()
+# config value after an upload, with clock <1> and write <2> cleared
+END_UPLOAD = PUSH_COEFFS & ~0x06
+
 # registers hold 16 bit 2s compliment values in consecutive LSB, MSB addresses
 # helper functions hard coded for two 8 bit bytes
 import numpy as np
@@ -37,7 +41,7 @@ def twosC2Int(b1, b0):
     """integer from 2 byte twos compliment representation"""
 ##    v = ((b1<<8) + b0 )
 ##    return v -(1<<16) if b1 & (1<<7) else v
-    return np.int16((b1<<8) + b0)
+    return np.uint16((b1<<8) + b0).view(np.int16)
 
 def int2TwosC(value):
     """2 byte twos compliment representation of value given"""
@@ -56,13 +60,30 @@ def setBit(index, value, on):
 
 import logging
 import os
-from pluto.controls import ON, OFF
+from pluto.controls import ON
+
+def _used(coeffs):
+    """the number of slots up to the last non zero coeff"""
+    nz = np.flatnonzero(coeffs)
+    return 0 if len(nz)==0 else nz[-1] + 1
 
 class FirConfig(object):
     def __init__(self, device):
         self.ftr_file = None
         self.dev = device
         self.ch = device.find_channel('out')
+        # register values written by this instance save read round trips
+        self._config = {}
+        # coeffs last uploaded to each path, None when not known
+        self._coeffs = {'tx':None, 'rx':None}
+        # coeffs read back since the last upload
+        self._read = {'tx':None, 'rx':None}
+
+    def invalidate(self):
+        """forget config and coeff values, after changes by other programs"""
+        self._config.clear()
+        self._coeffs = {'tx':None, 'rx':None}
+        self._read = {'tx':None, 'rx':None}
     # -------------------- on/off filter control -----------------------
     def enable(self):
         self.ch.attrs['voltage_filter_fir_en'].value = '1'
@@ -79,17 +100,25 @@ class FirConfig(object):
         else:
             raise ValueError('unknown signal path must be tx or rx')
 
+    def _readConfig(self, c_reg):
+        """config register value, read from the device only once"""
+        if c_reg not in self._config:
+            self._config[c_reg] = self.dev.reg_read(c_reg)
+        return self._config[c_reg]
+
+    def _writeConfig(self, c_reg, value):
+        self.dev.reg_write(c_reg, value)
+        self._config[c_reg] = value
+
     def clock(self, trx, on):
         """clock control is <1> in  T or R config register"""
         c_reg = self.configReg(trx)
-        value = self.dev.reg_read(c_reg)
-        self.dev.reg_write(c_reg, setBit(1, value, on))
+        self._writeConfig(c_reg, setBit(1, self._readConfig(c_reg), on))
 
     def write(self, trx, on):
         """write control is <2> in  T or R config register"""
         c_reg = self.configReg(trx)
-        value = self.dev.reg_read(c_reg)
-        self.dev.reg_write(c_reg, setBit(2, value, on))
+        self._writeConfig(c_reg, setBit(2, self._readConfig(c_reg), on))
 
     def txConfig(self, no_taps, gain):
         """pluto has only 1 tx channel"""
@@ -103,7 +132,7 @@ class FirConfig(object):
         b0 = 0 if gain==0 else 1         # <0>   filter gain set = -6dB
         value = b7_5 + b4_3 + b2 + b1 + b0
         logging.info('Tx config 0x{:x}'.format(value))
-        self.dev.reg_write(TX_FIR_CONFIG, value)
+        self._writeConfig(TX_FIR_CONFIG, value)
 
     def rxConfig(self, no_taps, gain):
         """pluto has only 1 rx channel"""
@@ -117,7 +146,7 @@ class FirConfig(object):
         b0 = 0                           # reserved
         value = b7_5 + b4_3 + b2 + b1 + b0
         logging.info('Rx config 0x{:x}'.format(value))
-        self.dev.reg_write(RX_FIR_CONFIG, value)
+        self._writeConfig(RX_FIR_CONFIG, value)
         # rx gain settings are +6, 0, -6, -12dB
         gain = (gain+6)//6
         # <1:0>   filter gain   +6, 0, -6, -12dB
@@ -126,50 +155,61 @@ class FirConfig(object):
     # ------------------------ write to fir ----------------------------
     def pushCoeffs(self, trx):
         """trigger write of values to T or R fir registers"""
-        self.dev.reg_write(self.configReg(trx), 0xFE)
+        self._writeConfig(self.configReg(trx), PUSH_COEFFS)
 
     def writeRegPair(self, addr, value):
         b1, b0 = int2TwosC(value)
         self.dev.reg_write(addr, b0)
         self.dev.reg_write(addr+1, b1)
 
-    def writeTx(self, coeffs):
-        """write coeff vector to the TX fir"""
+    def _upload(self, trx, coeffs, diff):
+        """write coeffs to the T or R fir, only the slots that need it
+           slots are skipped when they hold zero beyond both the last and
+           new coeffs, or with diff, when unaltered from the last upload"""
+        addr_reg, data_reg = (TX_COEFF_ADDR, TX_WRITE_REG) \
+                             if trx=='tx' else (RX_COEFF_ADDR, RX_WRITE_REG)
+        values = np.zeros(NO_SLOTS, np.int16)
+        values[:len(coeffs)] = coeffs
+        last = self._coeffs[trx]
+        if last is None:                 # unknown, so write them all
+            slots = np.arange(NO_SLOTS)
+        elif diff:
+            slots = np.flatnonzero(values!=last)
+        else:
+            slots = np.arange(max(_used(values), _used(last)))
+        c_reg = self.configReg(trx)
+        self._read[trx] = None
+        logging.debug(trx+' fir: writing {:d} slots'.format(len(slots)))
+        if len(slots)==0 and self._config.get(c_reg)==END_UPLOAD:
+            self._read[trx] = values
+            self.enable()
+            return
         self.disable()
-        self.clock('tx', ON)
-        self.write('tx', ON)
-        # loop through all writing the values from offset 0
-        for i in range(len(coeffs)):
-            self.dev.reg_write(TX_COEFF_ADDR, i)
-            self.writeRegPair(TX_WRITE_REG, coeffs[i])
-            self.pushCoeffs('tx')
-        for i in range(len(coeffs), 128):   # zero any remaining
-            self.dev.reg_write(TX_COEFF_ADDR, i)
-            self.writeRegPair(TX_WRITE_REG, 0)
-            self.pushCoeffs('tx')
-        # disable writing
-        self.clock('tx', OFF)
-        self.write('tx', OFF)
+        self.clock(trx, ON)
+        data = None                      # write data regs only if altered
+        for i in slots:
+            self.dev.reg_write(addr_reg, int(i))
+            b1, b0 = int2TwosC(values[i])
+            if data is None or b0!=data[1]:
+                self.dev.reg_write(data_reg, b0)
+            if data is None or b1!=data[0]:
+                self.dev.reg_write(data_reg+1, b1)
+            data = (b1, b0)
+            self.pushCoeffs(trx)
+        # disable writing, clock <1> and write <2> together
+        self._writeConfig(c_reg, END_UPLOAD)
+        self._coeffs[trx] = values
+        # the fir now holds values, so readTx/Rx need not read them back
+        self._read[trx] = values
         self.enable()
 
-    def writeRx(self, coeffs):
+    def writeTx(self, coeffs, diff=False):
+        """write coeff vector to the TX fir"""
+        self._upload('tx', coeffs, diff)
+
+    def writeRx(self, coeffs, diff=False):
         """write coeff vector to the RX fir"""
-        self.disable()
-        self.clock('rx', ON)
-        self.write('rx', ON)
-        # loop through all writing the values from offset 0
-        for i in range(len(coeffs)):
-            self.dev.reg_write(RX_COEFF_ADDR, i)
-            self.writeRegPair(RX_WRITE_REG, coeffs[i])
-            self.pushCoeffs('rx')
-        for i in range(len(coeffs), 128):   # zero any remaining
-            self.dev.reg_write(RX_COEFF_ADDR, i)
-            self.writeRegPair(RX_WRITE_REG, 0)
-            self.pushCoeffs('rx')
-        # disable writing
-        self.clock('rx', OFF)
-        self.write('rx', OFF)
-        self.enable()
+        self._upload('rx', coeffs, diff)
     # ------------------------ read from fir ---------------------------
     def readRegPair(self, start_add):
         """read consecutive registers, LSB, MSB"""
@@ -177,44 +217,53 @@ class FirConfig(object):
         usb = self.dev.reg_read(start_add+1)
         return twosC2Int(usb, lsb)
 
-    def readTx(self):
+    def _readback(self, trx, refresh):
+        """read all the T or R FIR coeffs, or the copy held since the
+           last upload or read, refresh reads them from the device
+           decoding the register bytes all at once"""
+        if refresh or self._read[trx] is None:
+            addr_reg, read_reg = (TX_COEFF_ADDR, TX_READ_REG) \
+                                 if trx=='tx' else (RX_COEFF_ADDR, RX_READ_REG)
+            self._writeConfig(self.configReg(trx), 0xEA)
+            regs = np.empty((NO_SLOTS, 2), np.uint8)    # LSB, MSB pairs
+            for addr in range(NO_SLOTS):
+                self.dev.reg_write(addr_reg, addr)
+                regs[addr, 0] = self.dev.reg_read(read_reg)
+                regs[addr, 1] = self.dev.reg_read(read_reg+1)
+            self._read[trx] = regs.view('<i2').ravel()
+        # remove leading/trailing zeros, a copy leaves the cache unaltered
+        return np.trim_zeros(self._read[trx]).copy()
+
+    def readTx(self, refresh=False):
         """read and return all the TX FIR coeffs"""
-        self.dev.reg_write(TX_FIR_CONFIG, 0xEA)
-        coeffs = []
-        for addr in range(0x80):
-            self.dev.reg_write(TX_COEFF_ADDR, addr)
-            coeffs.append(self.readRegPair(TX_READ_REG))
-        return np.trim_zeros(coeffs) # remove leading/trailing zeros
-
-    def readRx(self):
+        return self._readback('tx', refresh)
+
+    def readRx(self, refresh=False):
         """read and return all the RX FIR coeffs"""
-        self.dev.reg_write(RX_FIR_CONFIG, 0xEA)
-        coeffs = []
-        for addr in range(0x80):
-            self.dev.reg_write(RX_COEFF_ADDR, addr)
-            coeffs.append(self.readRegPair(RX_READ_REG))
-        return np.trim_zeros(coeffs) # remove leading/trailing zeros
+        return self._readback('rx', refresh)
     # ------------------- read Tx and Rx firs from file-----------------
     def loadFile(self, filename):
         """read filter and config data from a ftr file"""
+        from rsdLib.fileUtils import changeExt
         self.disable()
         filename = changeExt(filename, 'ftr')
         if os.path.isfile(filename):
             with open(filename, 'r') as fin:
                 ftr_file = fin.read()
             self.dev.attrs['filter_fir_config'].value = ftr_file
+            self.invalidate()         # the driver rewrites all of them
         else:
             raise FileNotFoundError(filename+' not found')
         self.enable()
 
 if __name__=='__main__':
     import sys
-    import iio
+    from pluto.iio_context import getContext
     logging.basicConfig(
         format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
         stream=sys.stdout, level=logging.DEBUG)
     try:  # iio returns None if items are not found
-        ctx = iio.Context('ip:pluto.local')
+        ctx = getContext()
         if ctx is not None:
             dev = ctx.find_device('ad9361-phy')
         else:
@@ -0,0 +1,99 @@
+"""
+    Control of several PlutoSdr devices in parallel
+    Calls are fanned out to the devices in a thread pool, the iio calls
+    release the GIL so a batch takes as long as the slowest device.
+    Results are returned in the order of the uris, with the exception in
+    place of the result for any device that failed.
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+from __future__ import print_function
+
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+
+from pluto.pluto_sdr import PlutoSdr
+
+class PlutoPool(object):
+    """a PlutoSdr for each uri, controlled together"""
+    def __init__(self, uris, **kwargs):
+        self.uris = list(uris)
+        self._executor = ThreadPoolExecutor(max(1, len(self.uris)))
+        self.sdrs = [None]*len(self.uris)
+        self.errors = {}
+        opened = self._run(lambda k: PlutoSdr(self.uris[k], **kwargs),
+                           range(len(self)))
+        for k, sdr in enumerate(opened):
+            if not isinstance(sdr, Exception):
+                self.sdrs[k] = sdr
+
+    def __len__(self):
+        return len(self.uris)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """release the devices and the worker threads"""
+        for sdr in self.sdrs:
+            if sdr is not None:
+                sdr.close()
+        self._executor.shutdown()
+
+    def _run(self, fn, indices):
+        """fn(k) for each index in parallel, exceptions in place of results
+           errors from this batch are kept in self.errors by uri"""
+        futures = [self._executor.submit(fn, k) for k in indices]
+        self.errors = {}
+        ans = []
+        for k, future in zip(indices, futures):
+            try:
+                ans.append(future.result())
+            except Exception as e:
+                logging.error('{:s}: {!r}'.format(self.uris[k], e))
+                self.errors[self.uris[k]] = e
+                ans.append(e)
+        return ans
+
+    def _device(self, k):
+        """the k'th PlutoSdr, which raises if it failed to open"""
+        if self.sdrs[k] is None:
+            raise OSError('no device at ' + self.uris[k])
+        return self.sdrs[k]
+
+    def map(self, fn):
+        """fn(sdr) for every device
+           return a list of the results or exceptions, in uri order"""
+        return self._run(lambda k: fn(self._device(k)), range(len(self)))
+
+    def call(self, name, *args, **kwargs):
+        """call the named PlutoSdr method on every device"""
+        return self.map(lambda sdr: getattr(sdr, name)(*args, **kwargs))
+
+    def configure(self, **kwargs):
+        """PlutoSdr.configure() on every device"""
+        return self.call('configure', **kwargs)
+
+    def readRx(self, no_samples, raw=True):
+        """a block of no_samples from every device"""
+        return self.call('readRx', no_samples, raw)
+
+    def capture(self, no_samples=0x4000, raw=False, desc=''):
+        """capture dicts from every device, each with the uri added"""
+        ans = self.call('capture', no_samples, raw, desc)
+        for uri, cap in zip(self.uris, ans):
+            if isinstance(cap, dict):
+                cap['uri'] = uri
+        return ans
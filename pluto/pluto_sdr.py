@@ -19,42 +19,51 @@ from __future__ import print_function
 
 import logging
 
-import iio
 import numpy as np
 
-PLUTO_ID = 'ip:pluto.local'
 NO_BITS = 12                      # internal ADC and DAC width
 
 # properties are in MHz, but the value set is a str
 from pluto.iio_lambdas import _M2Str
 
+from pluto import iio_context
 from pluto import pluto_dds
-from pluto.controls import ON, OFF, FLOAT, COMPLEX
+from pluto.iio_context import PLUTO_ID
+from pluto.iio_cache import AttrCache
+from pluto.resampler import Resampler, actualRate
+from pluto.sweep import Sweep
+from pluto.tx_stream import TxStream
+from pluto.controls import ON, OFF, COMPLEX, FLOAT_OF
 
 class PlutoSdr(object):
     """Encapsulation of Pluto SDR device
        iio lib interface used to expose common functionality
        RF signal data read/write capabilities for rx and tx"""
     no_bits = NO_BITS
+    complex_type = COMPLEX        # or COMPLEX64 for single precision
     TX_OFF = 0
     TX_DMA = 1
     TX_DDS = 2
-    def __init__(self, uri=PLUTO_ID):
-        # access to internal devices
-        try:
-            self.ctx = iio.Context(uri)
-        except OSError:
-            self.ctx = None
-            print('exception: no iio device context found at',uri)
-            return
+    def __init__(self, uri=PLUTO_ID, cache=False, ttl=None, check=True):
+        # attribute values held locally only if cache is enabled
+        self.cache = AttrCache(cache, ttl)
+        # access to internal devices, 'sim:' uris use the simulation
+        self._backend = iio_context.backend(uri)
+        # shared with other instances, raises OSError if not found
+        # with check, one already open is reconnected if it fails to answer
+        self.uri = uri
+        self.ctx = iio_context.getContext(uri, check)
         logging.debug('found context for pluto device')
         self.name = 'plutosdr'
         self.phy = self.ctx.find_device('ad9361-phy')
         # individual TRx controls
         self.phy_rx = self.phy.find_channel('voltage0', is_output=False)
         self.phy_tx = self.phy.find_channel('voltage0', is_output=True)
+        self.rx_lo = self.phy.find_channel('RX_LO', is_output=True)
+        self.tx_lo = self.phy.find_channel('TX_LO', is_output=True)
         # access to data channels for Rx
         self.adc = self.ctx.find_device('cf-ad9361-lpc')
+        self.rx_channels = self.adc.channels
         # access to data channels for Tx
         self.dac = self.ctx.find_device('cf-ad9361-dds-core-lpc')
         self.tx_channels = [self.dac.find_channel('voltage0', True)]
@@ -63,14 +72,36 @@ class PlutoSdr(object):
         self.dds = pluto_dds.Dds(self.dac)
         #  tx buffer, created in writeTx and retained for continuous output 
         self._tx_buff = None
+        self._tx_staging = None     # int16 data aligned for the dac
+        self._tx_scratch = {}       # float arrays for staging, by dtype
+        self._configured = {}       # configure() requests and values set
         self.tx_state = self.TX_OFF
         
+    def close(self):
+        """release the tx buffer and this instance's use of the context"""
+        if self.ctx is not None:
+            self._tx_buff = None
+            self.ctx = None
+            iio_context.releaseContext(self.uri)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def invalidate(self):
+        """discard any cached attribute and dds tone values, needed only
+           when the device is altered by other programs"""
+        self.cache.invalidate()
+        self.dds.invalidate()
+
     # ----------------- TRx Physical Layer controls -----------------------
     def _get_SamplingFreq(self):
         """internal sampling frequency in MHz (ADC and DAC are the same)"""
         # available from many channel none of which are named
         # changes to [4] seem to alter them all
-        value = self.phy_rx.attrs['sampling_frequency'].value
+        value = self.cache.read(self.phy_rx.attrs['sampling_frequency'])
         return int(value)/1e6
 
     def _set_SamplingFreq(self, value):
@@ -80,39 +111,90 @@ class PlutoSdr(object):
             self.phy_rx.attrs['sampling_frequency'].value = _M2Str(value)
         except OSError:
             print('value out of range:', value)
+        # rates and available options in all the devices follow this
+        self.invalidate()
 
     sampling_frequency = property(_get_SamplingFreq, _set_SamplingFreq)
 
     def rxSynth(self):
         # read only always
         values = [x.split(':')\
-                  for x in self.phy.attrs['rx_path_rates'].value.split(' ')]
+                  for x in self.cache.read(self.phy.attrs['rx_path_rates'])\
+                                                              .split(' ')]
         in_mhz = [(x[0], int(x[1])/1e6) for x in values]
         return dict(in_mhz)
 
     def txSynth(self):
         # read only always
         values = [x.split(':')\
-                  for x in self.phy.attrs['tx_path_rates'].value.split(' ')]
+                  for x in self.cache.read(self.phy.attrs['tx_path_rates'])\
+                                                              .split(' ')]
         in_mhz = [(x[0], int(x[1])/1e6) for x in values]
         return dict(in_mhz)
         
     def loopBack(self, enable):   # not clear how to control the injection to/from option
         """turn loop-back function on/off"""
         _enable = '1' if bool(enable) else '0'
-        self.phy.debug_attrs['loopback'].value = _enable
+        self.cache.write(self.phy.debug_attrs['loopback'], _enable)
+
+    # configure() settings in the order they are written, with the property
+    # for each, sampling rate first as the decimation options and the
+    # filter bandwidths follow it, then the LOs and lastly the gains
+    CONFIG_ORDER = (('fs', 'sampling_frequency'),
+                    ('decimation', 'rx_decimation'),
+                    ('rx_bw', 'rx_bandwidth'), ('tx_bw', 'tx_bandwidth'),
+                    ('rx_lo', 'rx_lo_freq'), ('tx_lo', 'tx_lo_freq'),
+                    ('rx_gain', 'rx_gain'), ('tx_gain', 'tx_gain'))
+
+    def _sameSetting(self, key, value, current):
+        """compare a requested setting with the current one, as read
+           the firmware sets the nearest value it can, e.g. the LO synth
+           steps, so a request read back as current last time is the same"""
+        if key=='decimation':
+            return bool(value)==current
+        if key=='rx_gain' and self.rx_gain_mode!='manual':
+            return False
+        if self._configured.get(key)==(value, current):
+            return True
+        if key.endswith('gain'):
+            return round(value, 3)==round(current, 3)
+        # frequencies are compared as the Hz strings written
+        return _M2Str(value)==str(int(round(current*1e6)))
+
+    def configure(self, fs=None, decimation=None, rx_bw=None, tx_bw=None,
+                  rx_lo=None, tx_lo=None, rx_gain=None, tx_gain=None):
+        """set several RF parameters together, frequencies in MHz, gain dB
+           only the values that differ from the current ones are written
+           return a dict of the values actually set by the firmware"""
+        settings = {'fs':fs, 'decimation':decimation, 'rx_bw':rx_bw,
+                    'tx_bw':tx_bw, 'rx_lo':rx_lo, 'tx_lo':tx_lo,
+                    'rx_gain':rx_gain, 'tx_gain':tx_gain}
+        ans = {}
+        for key, prop in self.CONFIG_ORDER:
+            value = settings[key]
+            if value is None:
+                continue
+            current = getattr(self, prop)
+            if not self._sameSetting(key, value, current):
+                logging.debug('configure: %s %s', key, value)
+                setattr(self, prop, value)
+                current = getattr(self, prop)   # as set by the firmware
+                self._configured[key] = (value, current)
+            ans[key] = current
+        return ans
 
     # ---------------------- Receiver control-------------------------
     # property actual value may be slightly different because the
     # firmware converts them to available value from the synth
     def rxStatus(self):
         """print the key parameters for the receive signal chain"""
+        fs = self.sampling_frequency
         print('Rx Fs:{:2.1f}MHz\tBB: {:7.2f}MHz'\
-              .format(self.sampling_frequency, self.rxBBSampling()))
+              .format(fs, fs/8 if self.rx_decimation else fs))
         print('   BW:{:2.1f}MHz\tLO: {:7.2f}MHz'\
               .format(self.rx_bandwidth, self.rx_lo_freq))
         print(' Gain:{:2.1f}dB\tMode: {:s}'\
-              .format(self.rx_gain, self.phy_rx.attrs['gain_control_mode'].value))
+              .format(self.rx_gain, self.rx_gain_mode))
 
     def rxBBSampling(self):
         """the rx base band sampling rate in MHz"""
@@ -122,9 +204,10 @@ class PlutoSdr(object):
     def _get_rxDownSampling(self):
         """control receiver output sampling frequency in MHz"""
         # only 2 options adc_rate or adc_rate/8
-        _adc = self.adc.channels[0].attrs
-        value = _adc['sampling_frequency'].value
-        options = _adc['sampling_frequency_available'].value.split(' ')
+        _adc = self.rx_channels[0].attrs
+        value = self.cache.read(_adc['sampling_frequency'])
+        options = self.cache.read(_adc['sampling_frequency_available'])\
+                                                              .split(' ')
         logging.debug('get: rx_decimation:<' + value)
         return value==options[1]
             
@@ -132,9 +215,10 @@ class PlutoSdr(object):
         if isinstance(enable, bool) or isinstance(enable, int):
             # only 2 options adc_rate or adc_rate/8
             _enable = enable!=0
-            _adc = self.adc.channels[0].attrs
-            options = _adc['sampling_frequency_available'].value.split(' ')
-            _adc['sampling_frequency'].value = options[_enable!=0]
+            _adc = self.rx_channels[0].attrs
+            options = self.cache.read(_adc['sampling_frequency_available'])\
+                                                              .split(' ')
+            self.cache.write(_adc['sampling_frequency'], options[_enable])
             logging.debug('set: rx_decimation:>' + str(options[_enable]))
         else:
             raise ValueError('bool expected: only 2 options for rx_sampling')
@@ -143,59 +227,66 @@ class PlutoSdr(object):
 
     def _get_rxLoFreq(self):
         """get receiver LO frequency property in MHz"""
-        value = self.phy.find_channel('RX_LO').attrs['frequency'].value
+        value = self.cache.read(self.rx_lo.attrs['frequency'])
         return int(value)/1e6
 
     def _set_rxLoFreq(self, value):
         """set receiver LO frequency property in MHz"""
-        self.phy.find_channel('RX_LO').attrs['frequency'].value = _M2Str(value)        
+        self.cache.write(self.rx_lo.attrs['frequency'], _M2Str(value))
     rx_lo_freq = property(_get_rxLoFreq, _set_rxLoFreq)
     
     def _get_rxBW(self):
         """get receiver analogue RF bandwidth in MHz"""
-        value = self.phy_rx.attrs['rf_bandwidth'].value
+        value = self.cache.read(self.phy_rx.attrs['rf_bandwidth'])
         return int(value)/1e6
 
     def _set_rxBW(self, value):
         """set receiver analogue RF bandwidth in MHz"""
-        self.phy_rx.attrs['rf_bandwidth'].value = _M2Str(value)
+        self.cache.write(self.phy_rx.attrs['rf_bandwidth'], _M2Str(value))
     rx_bandwidth = property(_get_rxBW, _set_rxBW, doc='RF bandwidth of rx path')
         
     def _get_rx_gain(self):
         """read the rx RF gain in dB"""
-        value = self.phy_rx.attrs['hardwaregain'].value.split(' ')
-        return float(value[0])
+        attr = self.phy_rx.attrs['hardwaregain']
+        if self.cache.enabled and self.rx_gain_mode!='manual':
+            value = attr.value      # follows the agc, so never cached
+        else:
+            value = self.cache.read(attr)
+        return float(value.split(' ')[0])
 
     # to set rx gain need to also control the gain mode
     def _set_rx_gain(self, value=None):
         """set the rx RF gain in dB or to auto, slow attack"""
         if value is None:
             print('mode set to "slow_attack", other controls not yet available')
-            self.phy_rx.attrs['gain_control_mode']\
-                                       .value = 'slow_attack'
+            self.cache.write(self.phy_rx.attrs['gain_control_mode'],
+                             'slow_attack')
+            # the gain now follows the agc
+            self.cache.invalidate(self.phy_rx.attrs['hardwaregain'])
         else:
-            self.phy_rx.attrs['gain_control_mode'].value = 'manual'
-            self.phy_rx.attrs['hardwaregain']\
-                                       .value = '{:2.3f} dB'.format(value)
+            self.cache.write(self.phy_rx.attrs['gain_control_mode'], 'manual')
+            self.cache.write(self.phy_rx.attrs['hardwaregain'],
+                             '{:2.3f} dB'.format(value))
     rx_gain = property(_get_rx_gain, _set_rx_gain)
 
     def _set_rx_gain_mode(self, mode):
         """set the gain mode to one of those available"""
-        avail = self.phy_rx.attrs['gain_control_mode_available'].value
+        avail = self.cache.read(self.phy_rx.attrs['gain_control_mode_available'])
         avail = avail.split() 
         # allow setting with just the first letter
         _mode = '' if len(mode)==0 else mode[0].upper()                    
         options = [av.capitalize()[0] for av in avail]
         if _mode in options:
             res = avail[options.index(_mode)]
-            self.phy_rx.attrs['gain_control_mode'].value = res
+            self.cache.write(self.phy_rx.attrs['gain_control_mode'], res)
+            self.cache.invalidate(self.phy_rx.attrs['hardwaregain'])
             logging.debug('gain mode set:', res)
         else:
             print('error: available modes are', avail)
     
     def _get_rx_gain_mode(self):
         """get the gain mode to one of those available"""
-        return self.phy_rx.attrs['gain_control_mode'].value
+        return self.cache.read(self.phy_rx.attrs['gain_control_mode'])
     rx_gain_mode = property(_get_rx_gain_mode, _set_rx_gain_mode)
     
     def _get_rx_rssi(self):
@@ -203,46 +294,115 @@ class PlutoSdr(object):
         return self._phy.channels[5].attrs['rssi'].value
     rsssi = property(_get_rx_rssi, None)  # read only
     
-    # getting data from the rx  
-    def readRx(self, no_samples, raw=True):
+    def createBuffer(self, device, no_samples, cyclic=False):
+        """an iio buffer for the adc or dac from the context backend"""
+        return self._backend.Buffer(device, no_samples, cyclic)
+
+    # getting data from the rx
+    def _rxDMA(self, value):
+        """control DMA channels"""
+        for ch in self.rx_channels:
+            ch.enabled = value
+
+    def rxStream(self, block_size, raw=True, out=None, fs_out=None):
+        """generator of consecutive rx blocks from a single iio buffer
+           channels are enabled and the buffer created only once, on the
+           first block, both are released when the generator is closed
+           complex blocks are converted into out, or one pooled array,
+           so each block is overwritten by the next, copy to keep it
+           with fs_out in MHz, blocks are resampled to that rate and
+           their length varies"""
+        if not raw and out is None:
+            out = np.empty(block_size, self.complex_type)
+        resampler = None if fs_out is None \
+                    else Resampler(self.rxBBSampling(), fs_out)
+        self._rxDMA(ON)
+        try:  # create a buffer of the right size to use
+            buff = self.createBuffer(self.adc, block_size)
+        except OSError:
+            self._rxDMA(OFF)
+            raise OSError('failed to create iio buffer')
+        try:
+            while True:
+                buff.refill()
+                iq = np.frombuffer(buff.read(), np.int16)
+                if resampler is not None:
+                    yield resampler.processRaw(iq) if raw else \
+                          resampler.process(self.raw2complex(iq, out))
+                else:
+                    yield iq if raw else self.raw2complex(iq, out)
+        finally:       # on close(), exhaustion or an error in the consumer
+            buff = None
+            self._rxDMA(OFF)
+            logging.debug('rx stream closed')
+
+    def readRx(self, no_samples, raw=True, out=None):
         # enable the channels
-        for ch in self.adc.channels:
-            ch.enabled = True
+        self._rxDMA(ON)
         try:  # create a buffer of the right size to use
-            buff = iio.Buffer(self.adc, no_samples)
+            buff = self.createBuffer(self.adc, no_samples)
             buff.refill()
             buffer = buff.read() 
             iq = np.frombuffer(buffer, np.int16)  
         except OSError:
-            for ch in self.adc.channels:
-                ch.enabled = True
+            self._rxDMA(OFF)
             raise OSError('failed to create iio buffer')
         if raw:
             return iq 
         else:
-            return self.raw2complex(iq)
-
-    def raw2complex(self, data):
-        """return a scaled complex float version of the raw data"""
-        # convert to float64, view performs an in place recast of the data
-        # from SO 5658047
+            return self.raw2complex(iq, out)
+
+    def raw2complex(self, data, out=None):
+        """return a scaled complex float version of the raw data
+           written into out if given, otherwise a new complex_type array"""
+        if out is None:
+            out = np.empty(len(data)//2, self.complex_type)
+        # the float view of out is an in place recast of the complex data
+        # from SO 5658047, so scale and convert in a single pass into it
         # are the #bits available from some debug attr?
         # scale for 11 bits (signed 12)
-        iq = 2**-(self.no_bits-1)*data.astype(FLOAT)
-        return iq.view(COMPLEX)
+        iq = out.view(FLOAT_OF[out.dtype.type])
+        np.multiply(data, iq.dtype.type(2**-(self.no_bits-1)), out=iq)
+        return out
     
-    def capture(self, no_samples=0x4000, raw=False, desc=''):
-        """read data from the rx and save with other RF params in a dict"""
+    def rxParams(self, desc=''):
+        """the RF params saved with captured data in a dict"""
         ans = {'desc':desc}
         ans['fs'] = self.sampling_frequency
         ans['fc'] = self.rx_lo_freq
         ans['rx_bw'] = self.rx_bandwidth
         ans['rx_gain'] = self.rx_gain
-        ans['data'] = self.readRx(no_samples, raw=raw)
+        return ans
+
+    def readResampled(self, no_samples, fs_out, raw=True):
+        """no_samples resampled to fs_out in MHz, once the filter settles"""
+        resampler = Resampler(self.rxBBSampling(), fs_out)
+        skip = resampler.settling
+        iq = self.readRx(resampler.inputLength(skip + no_samples))
+        if raw:
+            return resampler.processRaw(iq)[2*skip:]
+        return resampler.process(self.raw2complex(iq))[skip:]
+
+    def capture(self, no_samples=0x4000, raw=False, desc='', fs_out=None):
+        """read data from the rx and save with other RF params in a dict
+           with fs_out in MHz the data is resampled and fs is the rate
+           actually given, the nearest the resampler can make"""
+        ans = self.rxParams(desc)
+        if fs_out is None:
+            ans['data'] = self.readRx(no_samples, raw=raw)
+        else:
+            ans['data'] = self.readResampled(no_samples, fs_out, raw)
+            ans['fs'] = actualRate(self.rxBBSampling(), fs_out)
         # for raw data the device must provide the no of bits
         if raw:                     
             ans['bits'] = self.no_bits   
         return ans              
+
+    def sweep(self, f_start, f_stop, no_samples=0x1000, usable=0.8):
+        """power spectrum from f_start to f_stop MHz by stepping the rx LO
+           return (freqs, psd) with the psd in dBFS"""
+        return Sweep(self, no_samples, usable).run(f_start, f_stop)
+
     # -------------------- Transmitter control------------------------
     # 3 mutually exclusive states off, dma - transmit data using writeTx()
     # or dds - 1 or 2 tone output controlled via dds instance
@@ -293,8 +453,9 @@ class PlutoSdr(object):
         """control transmitter output interpolation"""
         # only 2 options dac_rate or dac_rate/8
         _dac = self.tx_channels[0].attrs
-        value = _dac['sampling_frequency'].value
-        options = _dac['sampling_frequency_available'].value.split(' ')
+        value = self.cache.read(_dac['sampling_frequency'])
+        options = self.cache.read(_dac['sampling_frequency_available'])\
+                                                              .split(' ')
         logging.debug('get: tx_decimation:<' + value)
         return value==options[1]
             
@@ -303,9 +464,12 @@ class PlutoSdr(object):
             # only 2 options dac_rate or dac_rate/8
             _enable = enable!=0
             _dac = self.tx_channels[0].attrs
-            options = _dac['sampling_frequency_available'].value.split(' ')
-            _dac['sampling_frequency'].value = options[_enable]
+            options = self.cache.read(_dac['sampling_frequency_available'])\
+                                                              .split(' ')
+            self.cache.write(_dac['sampling_frequency'], options[_enable])
             logging.debug('set: tx_decimation:>' + str(options[_enable]))
+            # the dds runs at the dac output rate
+            self.dds.invalidate()
         else:
             raise ValueError('bool expected: only 2 options for tx_sampling')
 
@@ -313,25 +477,25 @@ class PlutoSdr(object):
 
     def _get_txLoFreq(self):
         """transmitterer LO frequency property in MHz"""
-        value = self.phy.find_channel('TX_LO').attrs['frequency'].value
+        value = self.cache.read(self.tx_lo.attrs['frequency'])
         return int(value)/1e6
 
     def _set_txLoFreq(self, value):
-        self.phy.find_channel('TX_LO').attrs['frequency'].value = _M2Str(value)
+        self.cache.write(self.tx_lo.attrs['frequency'], _M2Str(value))
 
     tx_lo_freq = property(_get_txLoFreq, _set_txLoFreq)
     
     def _get_tx_gain(self):
         """get the tx RF gain in dB, it is always neg as an attenuation"""
-        value = self.phy_tx.attrs['hardwaregain'].value
+        value = self.cache.read(self.phy_tx.attrs['hardwaregain'])
         return float(value.split()[0])
 
     def _set_tx_gain(self, value):
         """set the tx RF gain in dB"""
         if value>0:
             raise ValueError('tx gain is an attenuation, so always negative')
-        self.phy_tx.attrs['hardwaregain']\
-                                  .value = '{:2.3f} dB'.format(value)
+        self.cache.write(self.phy_tx.attrs['hardwaregain'],
+                         '{:2.3f} dB'.format(value))
         
     tx_gain = property(_get_tx_gain, _set_tx_gain)
     
@@ -339,36 +503,69 @@ class PlutoSdr(object):
         """transmitter analogue RF bandwidth in MHz"""
         # available from channel [4] or [5] which are not named
         # iio-scope only changes [5], so use that 
-        value = self.phy_tx.attrs['rf_bandwidth'].value
+        value = self.cache.read(self.phy_tx.attrs['rf_bandwidth'])
         return int(value)/1e6
 
     def _set_txBW(self, value):
-        self.phy_tx.attrs['rf_bandwidth'].value = _M2Str(value)
+        self.cache.write(self.phy_tx.attrs['rf_bandwidth'], _M2Str(value))
 
     tx_bandwidth = property(_get_txBW, _set_txBW)
 
     def complex2raw(self, data, no_bits):
-        iq = np.round((2**(no_bits-1))*data.view(FLOAT)).astype(np.int16)
+        iq = data.view(FLOAT_OF[data.dtype.type])
+        iq = np.round((2**(no_bits-1))*iq).astype(np.int16)
         return iq
-    
+
+    def stageTx(self, samples, out, bits=None):
+        """scale samples into the int16 array out, aligned to the msb
+           raw samples have bits resolution, default self.no_bits, complex
+           are +/-1.0 full scale, return the part of out filled"""
+        if samples.dtype==np.int16:
+            out = out[:len(samples)]
+            bits = self.no_bits if bits is None else bits
+            np.left_shift(samples, 16 - bits, out=out)
+        else:   # rounded as complex2raw(), in a reused float scratch array
+            iq = samples.view(FLOAT_OF[samples.dtype.type])
+            out = out[:len(iq)]
+            scratch = self._tx_scratch.get(iq.dtype)
+            if scratch is None or len(scratch)<len(iq):
+                scratch = np.empty(len(iq), iq.dtype)
+                self._tx_scratch[iq.dtype] = scratch
+            scaled = scratch[:len(iq)]
+            np.multiply(iq, 2**15, out=scaled)
+            np.rint(scaled, out=scaled)
+            np.copyto(out, scaled, casting='unsafe')
+        return out
+
     def writeTx(self, samples):  #, raw=False): use samples.dtype
         """write to the Tx buffer and make it cyclic"""
-        if self._tx_buff is not None:
-            self._tx_buff = None               # turn off any previous signal
         if not(isinstance(samples, np.ndarray)):          
             logging.debug('tx: off')           # leave with transmitter off
             self.tx_state = self.TX_OFF
             return
-        if samples.dtype==np.int16:
-            data = samples<<4         # align 12 bit raw to msb
-        else:   # samples can come from some DiscreteSignalSource, if so
-                # data is complex IQ and scaled to +/-1.0 float range
-                # use 16 **not** self.no_bits to align data to msb
-            data = self.complex2raw(samples, 16)
-        # samples are 2 bytes each with interleaved I/Q value (no_samples = len/4)
-        self.tx_state = self.TX_DMA                 # enable the tx channels
+        if self._tx_state!=self.TX_DMA:
+            self._tx_buff = None               # turn off any previous signal
+            self.tx_state = self.TX_DMA        # enable the tx channels
+        return self.updateTx(samples)
+
+    def updateTx(self, samples):
+        """replace the cyclic Tx output, the tx state is left unaltered
+           so writeTx() must have been used first to enable the DMA
+           the buffer is always recreated, libiio refuses a second push
+           of a cyclic buffer"""
+        # int16 samples are 12 bit raw, otherwise they can come from some
+        # DiscreteSignalSource, if so data is complex IQ and scaled to
+        # +/-1.0 float range, both are aligned to the msb in the staging
+        # array which is reused while the length is unaltered
+        no_values = len(samples)*(1 if samples.dtype==np.int16 else 2)
+        if self._tx_staging is None or len(self._tx_staging)!=no_values:
+            self._tx_staging = np.empty(no_values, np.int16)
+        data = self.stageTx(samples, self._tx_staging)
+        # each sample is an I and a Q int16 value, so the buffer holds
+        # len(data)//2 samples, len(data)//4 would send only half of them
+        self._tx_buff = None                   # release the previous signal
         try:  # create a cyclic iio buffer for continuous tx output
-            self._tx_buff = iio.Buffer(self.dac, len(data)//4, True)
+            self._tx_buff = self.createBuffer(self.dac, len(data)//2, True)
             count = self._tx_buff.write(data)
             logging.debug(str(count)+' samples transmitted')
             self._tx_buff.push()
@@ -378,6 +575,12 @@ class PlutoSdr(object):
         # buffer retained after a successful call
         return count # just for now
 
+    def txStream(self, source, block_size=0x4000):
+        """transmit successive blocks from source once, without cycling
+           source is an iterator of blocks, an array or a capture dict
+           return the TxStream, with its underrun count, when done"""
+        return TxStream(self, source, block_size).run()
+
     def playback(self, data, level=-10):
         """transmit data captured from a similar device, level in dBFS"""
         if not isinstance(data, dict):
@@ -388,7 +591,7 @@ class PlutoSdr(object):
         self.sampling_rate = data['fs']
         self.tx_gain = level
         samples = data['data']
-        raw = not samples.dtype==COMPLEX
+        raw = samples.dtype.type not in FLOAT_OF
         if raw: # samples are interleaved int IQ possibly from another device
             if 'bits' in data.keys():
                 re_scale = self.no_bits - data['bits']
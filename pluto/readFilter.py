@@ -18,9 +18,11 @@ from __future__ import print_function
 
 import logging
 
+from functools import lru_cache
 from os import path
+
+import numpy as np
 from pluto.iio_lambdas import _Str2M
-from rsdLib.fileUtils import changeExt
 
 def _readGain(trx, a_line):
     """channel and gain information"""
@@ -50,42 +52,58 @@ def _readBwidth(a_line):
     trx = xx[0][2:4].lower()
     return {trx+'_bw':_Str2M(xx[1])}
 
-def readFilter(filename):
-    """read an flt file, parsing the lines and collecting data to a dict"""
-    filename = changeExt(filename, 'ftr')
+CACHE_SIZE = 64      # parsed files held, least recently used discarded
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _parseFilter(filename, mtime):
+    """parse an ftr file, mtime is part of the cache key so that a
+       modified file is parsed again"""
     ans = {'file':path.basename(filename)}
     taps = []
     with open(filename, 'r') as fin:
-        # read line by line
-        line = fin.readline().strip()
-        while line:
-            logging.debug(str(len(line))+': '+line)
-            if len(line)>1 and not(line[0]=='#'):
-                #logging.debug('line: '+line)
-                # process the line depending on the content
-                if line[:2].upper()=='TX':
-                    ans.update(_readGain('tx_', line))
-                elif line[:2].upper()=='RX':
-                    ans.update(_readGain('rx_', line))
-                elif line[0].upper()=='R':
-                    ans.update(_readSynth(line))
-                elif line[0].upper()=='B':
-                    ans.update(_readBwidth(line))
-                else:   # assume line contains tap values
-                    try:
-                        taps.append([int(x) for x in line.split(',')])
-                    except:
-                        raise IOError('invalid tap values '+line)
-            # next line
-            line = fin.readline().strip()
-        # assume only 2 sets of taps in rx, tx order
-        # i.e. shape(taps)[1]==2
-        # also shape(taps)[0] should be a multiple of 16
-        ans['rx_taps'] = [t[0] for t in taps]
-        logging.info('rx taps: {:}'.format(len(ans['rx_taps'])))
-        ans['tx_taps'] = [t[1] for t in taps]
-        logging.info('tx taps: {:}'.format(len(ans['tx_taps'])))     
-        return ans
+        lines = fin.read().splitlines()
+    for line in lines:
+        line = line.strip()
+        logging.debug('%d: %s', len(line), line)
+        if len(line)>1 and not(line[0]=='#'):
+            # process the line depending on the content
+            if line[:2].upper()=='TX':
+                ans.update(_readGain('tx_', line))
+            elif line[:2].upper()=='RX':
+                ans.update(_readGain('rx_', line))
+            elif line[0].upper()=='R':
+                ans.update(_readSynth(line))
+            elif line[0].upper()=='B':
+                ans.update(_readBwidth(line))
+            else:   # assume line contains tap values
+                taps.append(line)
+    # assume only 2 sets of taps in rx, tx order, parsed in one pass
+    # i.e. shape(taps)[1]==2
+    # also shape(taps)[0] should be a multiple of 16
+    try:
+        taps = np.loadtxt(taps, np.int16, delimiter=',', ndmin=2)
+    except ValueError as err:
+        raise IOError('invalid tap values '+str(err))
+    ans['rx_taps'] = taps[:, 0].copy()
+    logging.info('rx taps: %d', len(ans['rx_taps']))
+    ans['tx_taps'] = taps[:, 1].copy()
+    logging.info('tx taps: %d', len(ans['tx_taps']))
+    return ans
+
+def readFilter(filename):
+    """read an flt file, parsing the lines and collecting data to a dict
+       files are parsed once and held until modified"""
+    from rsdLib.fileUtils import changeExt
+    filename = path.abspath(changeExt(filename, 'ftr'))
+    ans = dict(_parseFilter(filename, path.getmtime(filename)))
+    # copies so the cached taps cannot be altered
+    ans['rx_taps'] = ans['rx_taps'].copy()
+    ans['tx_taps'] = ans['tx_taps'].copy()
+    return ans
+
+def clearCache():
+    """discard all the parsed files"""
+    _parseFilter.cache_clear()
 
 if __name__=='__main__':
     import sys
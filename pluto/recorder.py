@@ -0,0 +1,91 @@
+"""
+    Record rx data straight to disk through a memory mapped file
+    Blocks from PlutoSdr.rxStream() are copied into a preallocated file
+    so memory use is bounded by the block size, not the capture length.
+    The RF params collected by capture() are saved in a json sidecar.
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+from __future__ import print_function
+
+import json
+import logging
+
+from os import path
+
+import numpy as np
+
+from pluto.resampler import actualRate
+
+DATA_EXT = '.iq'
+INFO_EXT = '.json'
+FLUSH_BLOCKS = 64           # limit the dirty pages held by the OS
+
+def _fileNames(filename):
+    """data and sidecar file names, whatever extension is given"""
+    stem = path.splitext(filename)[0]
+    return stem + DATA_EXT, stem + INFO_EXT
+
+def record(sdr, filename, no_samples, block_size=0x4000, raw=True, desc='',
+           fs_out=None):
+    """stream no_samples from the rx of sdr into filename
+       raw data is interleaved int16 IQ, otherwise sdr.complex_type
+       with fs_out in MHz the data is resampled and fs is the rate
+       actually given, the nearest the resampler can make
+       return the dict of RF params written to the sidecar"""
+    data_file, info_file = _fileNames(filename)
+    info = sdr.rxParams(desc)
+    if fs_out is not None:
+        info['fs'] = actualRate(sdr.rxBBSampling(), fs_out)
+    info['bits'] = sdr.no_bits
+    info['no_samples'] = no_samples
+    info['dtype'] = np.dtype(np.int16 if raw else sdr.complex_type).name
+    # preallocate the whole file, values per sample are 2 raw or 1 complex
+    per_sample = 2 if raw else 1
+    data = np.memmap(data_file, info['dtype'], 'w+',
+                     shape=(no_samples*per_sample,))
+    # resampled blocks are complex unless raw, and vary in length
+    stream = sdr.rxStream(block_size, raw or fs_out is None, fs_out=fs_out)
+    try:
+        done = 0
+        for count, block in enumerate(stream):
+            size = len(block)//2 if block.dtype==np.int16 else len(block)
+            n = min(size, no_samples - done)
+            out = data[done*per_sample:(done + n)*per_sample]
+            if raw:
+                out[:] = block[:2*n]
+            elif fs_out is None:      # convert directly into the file
+                sdr.raw2complex(block[:2*n], out)
+            else:
+                out[:] = block[:n]
+            done += n
+            if done>=no_samples:
+                break
+            if count % FLUSH_BLOCKS==FLUSH_BLOCKS - 1:
+                data.flush()
+    finally:
+        stream.close()
+        data.flush()
+        del data
+    with open(info_file, 'w') as fout:
+        json.dump(info, fout, indent=1)
+    logging.info('recorded {:d} samples to {:s}'.format(no_samples, data_file))
+    return info
+
+def loadCapture(filename, mode='r'):
+    """return a recording as a capture() dict with the data memory mapped"""
+    data_file, info_file = _fileNames(filename)
+    with open(info_file, 'r') as fin:
+        ans = json.load(fin)
+    ans['data'] = np.memmap(data_file, ans.pop('dtype'), mode)
+    if ans['data'].dtype!=np.int16:
+        del ans['bits']       # as capture(), only raw data has bits
+    return ans
@@ -0,0 +1,116 @@
+"""
+    Rational resampler for rx data at rates the hardware cannot give
+    The rate is changed by up/down, the nearest fraction to fs_out/fs_in,
+    with a windowed sinc low pass filter split into up polyphase
+    branches.  Each output is one branch applied to the latest inputs,
+    computed for a whole block at once, and the inputs and phase needed
+    for the next block are carried over so blocks can be of any size.
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+from __future__ import print_function
+
+import logging
+
+from fractions import Fraction
+
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+MAX_DENOMINATOR = 1000     # limits the number of polyphase branches
+TAPS_PER_PHASE = 16        # branch length, per input sample of decimation
+CUTOFF = 0.9               # fraction of the output or input nyquist
+KAISER_BETA = 8.6          # about 80dB stop band
+
+def design(up, down, taps_per_phase=TAPS_PER_PHASE):
+    """low pass windowed sinc for the rate up times the input rate,
+       with a gain of up, as an (up, no_taps) array of branches
+       branches are longer when decimating, to keep the transition band
+       a fixed fraction of the output rate"""
+    no_taps = taps_per_phase*-(-down//up)          # ceil(down/up)
+    n = up*no_taps
+    fc = CUTOFF*0.5/max(up, down)        # cycles per upsampled sample
+    t = np.arange(n) - (n - 1)/2.0
+    h = 2*fc*np.sinc(2*fc*t)*np.kaiser(n, KAISER_BETA)
+    h *= up/np.sum(h)                    # unity gain at dc once decimated
+    return h.reshape(no_taps, up).T
+
+def ratio(fs_in, fs_out):
+    """the fraction up/down nearest to fs_out/fs_in"""
+    return (Fraction(str(fs_out))/Fraction(str(fs_in)))\
+           .limit_denominator(MAX_DENOMINATOR)
+
+def actualRate(fs_in, fs_out):
+    """the rate a Resampler gives when asked for fs_out, as fs_in"""
+    return float(fs_in*ratio(fs_in, fs_out))
+
+class Resampler(object):
+    """change the sample rate of a stream of blocks from fs_in to fs_out
+       the output is delayed by the filter, delay output samples, and
+       the first settling outputs include the zeros before the input"""
+    def __init__(self, fs_in, fs_out, taps_per_phase=TAPS_PER_PHASE):
+        up_down = ratio(fs_in, fs_out)
+        self.up = up_down.numerator
+        self.down = up_down.denominator
+        self.fs_out = actualRate(fs_in, fs_out)
+        if self.fs_out!=fs_out:
+            logging.info('resampling to {:f}MHz'.format(float(self.fs_out)))
+        # branches reversed to apply directly to a window of inputs
+        self.branches = design(self.up, self.down, taps_per_phase)[:, ::-1]
+        self._taps = {}               # branches by input precision
+        self.delay = (self.branches.size - 1)/(2.0*self.down)
+        self.settling = int(np.ceil(2*self.delay))
+        self.reset()
+
+    def reset(self):
+        """start again with no input history"""
+        self._history = np.zeros(self.branches.shape[1] - 1, np.complex64)
+        self._pos = 0     # next output time, in upsampled samples
+
+    def inputLength(self, no_outputs):
+        """inputs needed for no_outputs after reset()"""
+        return (self.down*(no_outputs - 1))//self.up + 1
+
+    def process(self, x):
+        """resample a block of complex samples, the output length varies
+           with the phase carried from the previous block"""
+        if len(x)==0:
+            return np.empty(0, x.dtype)
+        taps = self._taps.get(x.dtype)
+        if taps is None:
+            taps = self.branches.astype(x.real.dtype)
+            self._taps[x.dtype] = taps
+        n = len(self._history)
+        data = np.concatenate((self._history.astype(x.dtype), x))
+        # output times up to the last input, relative to the first of x
+        pos = np.arange(self._pos, len(x)*self.up, self.down)
+        windows = sliding_window_view(data, n + 1)
+        y = np.empty(len(pos), x.dtype)
+        for k in range(min(self.up, len(pos))):
+            # outputs k, k + up, ... use the same branch with their inputs
+            # down apart, a strided view so the windows are not copied
+            first = pos[k]//self.up
+            rows = windows[first:first + self.down*len(y[k::self.up]):self.down]
+            np.einsum('mk,k->m', rows, taps[pos[k] % self.up], out=y[k::self.up])
+        self._pos = (pos[-1] if len(pos) else self._pos - self.down) \
+                    + self.down - len(x)*self.up
+        self._history = data[len(data) - n:]
+        return y
+
+    def processRaw(self, raw):
+        """resample a block of interleaved int16 IQ, returned as the same"""
+        x = np.empty(len(raw)//2, np.complex64)
+        x.view(np.float32)[:] = raw
+        iq = self.process(x).view(np.float32)
+        np.rint(iq, out=iq)
+        np.clip(iq, -2**15, 2**15 - 1, out=iq)
+        return iq.astype(np.int16)
@@ -0,0 +1,143 @@
+"""
+    Background rx acquisition into a preallocated ring of blocks
+    A thread refills the rx buffer continuously, whatever the speed of
+    the consumer, which pulls blocks with read(). The thread only moves
+    the head and the consumer only the tail, so no lock is needed.
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+from __future__ import print_function
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+class RxRing(object):
+    """rx blocks from a PlutoSdr held in a ring of no_blocks, of which
+       no_blocks - 1 can wait to be read while the next is written
+       when the consumer falls behind the oldest blocks are overwritten,
+       each one counted as dropped and each occurrence as an overrun"""
+    def __init__(self, sdr, block_size=0x4000, no_blocks=16):
+        self.sdr = sdr
+        self.block_size = block_size
+        self.no_blocks = no_blocks
+        # interleaved IQ int16, 2 values per sample
+        self._ring = np.zeros((no_blocks, 2*block_size), np.int16)
+        self._head = 0           # blocks written, altered only by the thread
+        self._tail = 0           # blocks read, altered only by the consumer
+        self._ready = threading.Event()
+        self._running = False
+        self._thread = None
+        self.error = None        # exception that stopped the thread
+        self.overruns = 0
+        self.dropped = 0
+        self.high_water = 0      # most blocks waiting to be read
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        """start the acquisition thread"""
+        if self._running:
+            return
+        self._running = True
+        self.error = None
+        self._thread = threading.Thread(target=self._acquire,
+                                        name='RxRing', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """stop the thread, blocks not yet read remain available"""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _acquire(self):
+        stream = self.sdr.rxStream(self.block_size)
+        overflowing = False
+        try:
+            for block in stream:
+                if not self._running:
+                    break
+                # a full ring overwrites the oldest block not yet read, one
+                # slot is kept for the block being written so no_blocks - 1
+                # can be read, as in read()
+                if self._head - self._tail>=self.no_blocks - 1:
+                    self.dropped += 1
+                    if not overflowing:
+                        self.overruns += 1
+                        logging.debug('rx ring overrun')
+                    overflowing = True
+                else:
+                    overflowing = False
+                self._ring[self._head % self.no_blocks] = block
+                self._head += 1
+                fill = min(self._head - self._tail, self.no_blocks - 1)
+                self.high_water = max(self.high_water, fill)
+                self._ready.set()
+        except Exception as err:
+            logging.error('rx ring stopped: ' + str(err))
+            self.error = err
+        finally:
+            stream.close()
+            self._running = False
+            self._ready.set()          # release a waiting consumer
+
+    def available(self):
+        """the number of blocks waiting to be read"""
+        return min(self._head - self._tail, self.no_blocks - 1)
+
+    def _wait(self, deadline):
+        """wait for at least 1 block, raise if none arrive in time"""
+        while self._head==self._tail:
+            if not self._running:
+                if self.error is not None:
+                    raise self.error
+                raise OSError('rx ring is not running')
+            self._ready.clear()
+            if self._head!=self._tail:
+                break
+            remaining = None if deadline is None \
+                        else deadline - time.monotonic()
+            if remaining is not None and remaining<=0:
+                raise TimeoutError('no rx data within timeout')
+            self._ready.wait(remaining)
+
+    def read(self, n=1, timeout=None, raw=True):
+        """return the next n blocks as one array, waiting up to timeout
+           seconds for them to arrive, or indefinitely if None"""
+        data = np.empty((n, 2*self.block_size), np.int16)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        got = 0
+        while got<n:
+            self._wait(deadline)
+            # the slot being written is 1 behind the oldest valid block
+            first = self._head - self.no_blocks + 1
+            self._tail = max(self._tail, first)
+            count = min(n - got, self._head - self._tail)
+            slots = np.arange(self._tail, self._tail + count) % self.no_blocks
+            np.take(self._ring, slots, axis=0, out=data[got:got+count])
+            # discard any overwritten while copying and copy again
+            lost = self._head - self.no_blocks + 1 - self._tail
+            if lost>0:
+                self._tail += min(lost, count)
+                continue
+            self._tail += count
+            got += count
+        data = data.ravel()
+        return data if raw else self.sdr.raw2complex(data)
@@ -0,0 +1,94 @@
+"""
+    Streaming power spectrum of rx data by Welch's method
+    Raw int16 blocks from readRx() or rxStream() are split into
+    overlapping windowed segments whose power spectra are averaged as
+    the blocks arrive.  Only the samples of a partial segment are kept
+    between blocks.  The window includes the NO_BITS scaling used by
+    raw2complex() and the normalisation so that the power is in dBFS.
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+from __future__ import print_function
+
+import logging
+
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+from pluto.pluto_sdr import NO_BITS
+
+MIN_POWER = 1e-20          # floor to avoid log10(0), -200dBFS
+
+class WelchPsd(object):
+    """running average power spectrum of interleaved int16 IQ blocks
+       segments of nfft samples overlap by the fraction given, alpha
+       None averages all segments since reset(), otherwise each block
+       is added with an exponential weight alpha"""
+    def __init__(self, nfft=1024, overlap=0.5, window=np.hanning,
+                 bits=NO_BITS, alpha=None):
+        self.nfft = nfft
+        self.step = max(1, int(round(nfft*(1 - overlap))))
+        self.alpha = alpha
+        # a full scale tone is 0dBFS: raw scaling and window gain together
+        w = window(nfft)
+        self.window = (w*2**-(bits - 1)/np.sum(w)).astype(np.float32)
+        self._carry = np.empty(0, np.complex64)   # start of the next segment
+        self._work = np.empty((0, nfft), np.complex64)
+        self._sum = np.zeros(nfft)
+        self.count = 0                            # segments averaged
+
+    def reset(self):
+        """discard the average and any partial segment"""
+        self._carry = self._carry[:0]
+        self._sum[:] = 0
+        self.count = 0
+
+    def update(self, raw):
+        """add the segments completed by a block of interleaved int16 IQ"""
+        data = np.empty(len(self._carry) + len(raw)//2, np.complex64)
+        data[:len(self._carry)] = self._carry
+        # int16 to float in the float view, the scaling is in the window
+        data[len(self._carry):].view(np.float32)[:] = raw
+        no_segs = (len(data) - self.nfft)//self.step + 1
+        if no_segs<=0:
+            self._carry = data
+            return
+        if len(self._work)<no_segs:
+            self._work = np.empty((no_segs, self.nfft), np.complex64)
+        work = self._work[:no_segs]
+        segs = sliding_window_view(data, self.nfft)[::self.step][:no_segs]
+        np.multiply(segs, self.window, out=work)
+        spectra = np.fft.fft(work, axis=1)
+        power = spectra.real**2
+        power += spectra.imag**2
+        if self.alpha is None:
+            self._sum += power.sum(axis=0)
+            self.count += no_segs
+        else:
+            mean = power.mean(axis=0)
+            if self.count==0:
+                self._sum[:] = mean
+            else:
+                self._sum *= 1 - self.alpha
+                self._sum += self.alpha*mean
+            self.count = 1
+        self._carry = data[no_segs*self.step:].copy()
+        logging.debug('psd: {:d} segments'.format(no_segs))
+
+    def psd(self):
+        """the averaged power in dBFS, negative to positive frequencies"""
+        power = self._sum/max(1, self.count)
+        return 10*np.log10(np.maximum(np.fft.fftshift(power), MIN_POWER))
+
+    def freqs(self, fs, fc=0):
+        """frequencies in MHz of the psd bins, fs and fc in MHz"""
+        return fc + fs*(np.arange(self.nfft) - self.nfft//2)/self.nfft
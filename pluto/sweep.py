@@ -0,0 +1,65 @@
+"""
+    Wideband spectrum sweep by stepping the rx LO
+    Each step is captured, windowed and transformed to a power spectrum,
+    the edge bins trimmed and the steps stitched into one spectrum. The
+    FFTs run in a worker thread, overlapping the retune and capture of
+    the next step.
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+from __future__ import print_function
+
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+MIN_POWER = 1e-20          # floor to avoid log10(0), -200dBFS
+
+class Sweep(object):
+    """power spectrum across a span wider than the rx bandwidth
+       usable is the central fraction of each step's spectrum kept"""
+    def __init__(self, sdr, no_samples=0x1000, usable=0.8):
+        self.sdr = sdr
+        self.no_samples = no_samples
+        self.keep = int(usable*no_samples)//2*2     # bins kept per step
+        self.window = np.hanning(no_samples)
+        # a full scale tone is 0dBFS
+        self._norm = np.sum(self.window)**2
+
+    def _psd(self, raw):
+        """trimmed power spectrum in dBFS of a block of raw data"""
+        iq = self.sdr.raw2complex(raw)
+        iq *= self.window
+        power = np.abs(np.fft.fftshift(np.fft.fft(iq)))**2
+        first = (self.no_samples - self.keep)//2
+        power = power[first:first + self.keep]/self._norm
+        return 10*np.log10(np.maximum(power, MIN_POWER))
+
+    def run(self, f_start, f_stop):
+        """return (freqs, psd) from f_start to f_stop in MHz, psd in dBFS"""
+        df = self.sdr.rxBBSampling()/self.no_samples
+        step = self.keep*df          # so that the steps abut exactly
+        no_steps = int(np.ceil((f_stop - f_start)/step))
+        psd = np.empty(no_steps*self.keep)
+        with ThreadPoolExecutor(1) as worker:
+            pending = []
+            for k in range(no_steps):
+                self.sdr.rx_lo_freq = f_start + step*(k + 0.5)
+                raw = self.sdr.readRx(self.no_samples)
+                pending.append(worker.submit(self._psd, raw))
+            for k, result in enumerate(pending):
+                psd[k*self.keep:(k + 1)*self.keep] = result.result()
+        logging.debug('sweep: {:d} steps of {:5.3f}MHz'.format(no_steps, step))
+        freqs = f_start + df*np.arange(len(psd))
+        inside = freqs<=f_stop
+        return freqs[inside], psd[inside]
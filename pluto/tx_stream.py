@@ -0,0 +1,168 @@
+"""
+    Non-cyclic tx streaming of successive blocks
+    Blocks come from an iterator, an array or a capture dict, which may
+    be memory mapped by recorder.loadCapture(), so the waveform need not
+    fit in memory. A thread stages the next blocks while the current one
+    is pushed, so the dac is kept supplied.
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+from __future__ import print_function
+
+import logging
+import queue
+import threading
+
+import numpy as np
+
+POLL = 0.1                   # seconds between checks for a stop request
+KERNEL_BUFFERS = 4           # blocks queued in the kernel, libiio default
+
+class TxStream(object):
+    """transmit the blocks from source once, without cycling
+       raw int16 blocks are interleaved IQ, complex are +/-1.0 full scale
+       up to no_buffers blocks are staged ahead of the one being pushed
+       and an underrun counted whenever none is ready for the next push
+       pushed blocks wait in KERNEL_BUFFERS kernel blocks, so at the end
+       as many zero blocks are pushed, returning only when the last of
+       the source has been sent and before the tx is turned off"""
+    def __init__(self, sdr, source, block_size=0x4000, no_buffers=2):
+        self.sdr = sdr
+        self.block_size = block_size
+        self._bits = None
+        if isinstance(source, dict):    # from capture() or loadCapture()
+            self._bits = source.get('bits')
+            source = source['data']
+        self._source = source
+        # being staged, queued and being pushed
+        self._staged = np.zeros((no_buffers + 2, 2*block_size), np.int16)
+        self._queue = queue.Queue(no_buffers)
+        self._running = False
+        self._threads = []
+        self.error = None
+        self.blocks = 0
+        self.underruns = 0
+
+    def _blocks(self):
+        """successive blocks from the source"""
+        if isinstance(self._source, np.ndarray):
+            per_block = self.block_size
+            if self._source.dtype==np.int16:
+                per_block *= 2           # interleaved IQ values
+            for start in range(0, len(self._source), per_block):
+                yield self._source[start:start + per_block]
+        else:
+            for block in self._source:
+                yield block
+
+    def _put(self, item):
+        while self._running:
+            try:
+                self._queue.put(item, timeout=POLL)
+                return
+            except queue.Full:
+                pass
+
+    def _get(self):
+        while self._running:
+            try:
+                return self._queue.get(timeout=POLL)
+            except queue.Empty:
+                pass
+        return None
+
+    def _stage(self):
+        """scale successive blocks into the staging arrays"""
+        try:
+            for count, block in enumerate(self._blocks()):
+                if not self._running:
+                    break
+                staged = self._staged[count % len(self._staged)]
+                values = len(block)*(1 if block.dtype==np.int16 else 2)
+                if values>len(staged):
+                    raise ValueError('block larger than the tx buffer')
+                filled = self.sdr.stageTx(block, staged, self._bits)
+                staged[len(filled):] = 0         # pad a short last block
+                self._put(staged)
+        except Exception as err:
+            logging.error('tx staging stopped: ' + str(err))
+            self.error = err
+        finally:
+            self._put(None)                      # end of the source
+
+    def _push(self):
+        """push staged blocks to the dac as they are ready"""
+        try:
+            buff = self.sdr.createBuffer(self.sdr.dac, self.block_size)
+            # prime, starting once the staging queue is full
+            while self._running and not self._queue.full() and \
+                  self._threads[0].is_alive():
+                self._threads[0].join(POLL)
+            while self._running:
+                try:
+                    staged = self._queue.get_nowait()
+                except queue.Empty:
+                    self.underruns += 1
+                    logging.debug('tx stream underrun')
+                    staged = self._get()
+                if staged is None:        # the end, unless staging failed
+                    if self.error is None:
+                        self._drain(buff)
+                    break
+                buff.write(staged)
+                buff.push()
+                self.blocks += 1
+        except Exception as err:
+            logging.error('tx stream stopped: ' + str(err))
+            self.error = err
+        finally:
+            buff = None
+            self._running = False
+            self.sdr.tx_state = self.sdr.TX_OFF
+
+    def _drain(self, buff):
+        """push zero blocks until every kernel block holds zeros, so all
+           the blocks of the source have been sent by the dac"""
+        zeros = np.zeros(2*self.block_size, np.int16)
+        for _ in range(KERNEL_BUFFERS):
+            buff.write(zeros)     # each push may move to another block
+            buff.push()
+
+    def start(self):
+        """start transmitting in the background"""
+        self.sdr._tx_buff = None          # stop any cyclic output
+        self.sdr.tx_state = self.sdr.TX_DMA
+        self._running = True
+        self._threads = [threading.Thread(target=self._stage, daemon=True),
+                         threading.Thread(target=self._push, daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def wait(self):
+        """wait for all blocks to be pushed, raise any error"""
+        for thread in self._threads:
+            thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def stop(self):
+        """stop transmitting before the end of the source"""
+        self._running = False
+        for thread in self._threads:
+            thread.join()
+
+    def run(self):
+        """transmit all the blocks, returning when done"""
+        self.start()
+        self.wait()
+        logging.info('{:d} blocks transmitted, {:d} underruns'\
+                     .format(self.blocks, self.underruns))
+        return self
@@ -2,6 +2,7 @@
 # v 1.0.x - 24aug18 - initial release, functional with some errors and difficulties
 # v 1.1.x - 28may19 - Corrections, testing of read/write, capture playback via IpyNBs
 # v 1.1.x - 27may20 - corrections to test/notebooks from user feedback
+# v 1.2.x - 17oct26 - performance, streaming and a simulated backend
 
-__version__ = '1.1.2'
-__DATE__ = '27may20'
+__version__ = '1.2.0'
+__DATE__ = '17oct26'
@@ -0,0 +1,136 @@
+"""
+    Test waveforms for the transmitter
+    Multi-tone, chirp and noise waveforms generated directly as the
+    interleaved int16 IQ, NO_BITS resolution, that writeTx() expects.
+    Tones are fitted to a whole number of cycles for seamless cyclic
+    output and waveforms are cached by their parameters.  toneBlocks()
+    continues the phase of each tone from one block to the next for
+    streaming with txStream().
+
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation under
+ * version 2.1 of the License.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+"""
+from __future__ import print_function
+
+import logging
+
+from functools import lru_cache
+
+import numpy as np
+
+from pluto.pluto_sdr import NO_BITS
+
+FULL_SCALE = 2**(NO_BITS - 1) - 1     # peak int value
+CACHE_SIZE = 16                       # waveforms, each may be large
+
+def fitFreq(f, fs, no_samples):
+    """the nearest frequency with a whole number of cycles in no_samples"""
+    return round(f*no_samples/fs)*fs/no_samples
+
+def _tuple(values, n, default):
+    """values for n tones as a tuple, from None, one value or a list"""
+    if values is None:
+        return (default,)*n
+    if np.isscalar(values):
+        return (values,)*n
+    return tuple(values)
+
+def _toRaw(iq, scale):
+    """interleaved int16 from the float (n, 2) array iq times scale"""
+    iq *= scale
+    np.rint(iq, out=iq)
+    return iq.astype(np.int16).ravel()
+
+def _addTone(iq, cycles, phase, amp, start=0):
+    """add amp*exp(j(2pi*cycles*n + phase)) to iq, cycles per sample"""
+    # angles in float64 for accuracy over long waveforms
+    angle = np.arange(start, start + len(iq), dtype=np.float64)
+    angle *= 2*np.pi*cycles
+    angle += phase
+    iq[:, 0] += amp*np.cos(angle)
+    iq[:, 1] += amp*np.sin(angle)
+
+@lru_cache(CACHE_SIZE)
+def _multiTone(freqs, fs, no_samples, amps, phases, level, fit):
+    iq = np.zeros((no_samples, 2), np.float32)
+    for f, amp, phase in zip(freqs, amps, phases):
+        if fit:
+            f = fitFreq(f, fs, no_samples)
+        _addTone(iq, f/fs, np.radians(phase), amp)
+    # the peak of the sum is at most level
+    ans = _toRaw(iq, FULL_SCALE*10**(level/20.0)/sum(amps))
+    ans.flags.writeable = False       # shared by later calls
+    return ans
+
+def multiTone(freqs, fs, no_samples, amps=None, phases=None, level=0,
+              fit=True):
+    """the sum of tones at freqs MHz, fs in MHz, as interleaved int16
+       amps are relative, phases in degs and the peak is level dBFS
+       with fit, each tone has a whole number of cycles in no_samples"""
+    freqs = _tuple(freqs, 1, 0)
+    return _multiTone(freqs, fs, no_samples, _tuple(amps, len(freqs), 1.0),
+                      _tuple(phases, len(freqs), 0.0), level, fit)
+
+@lru_cache(CACHE_SIZE)
+def _chirp(f_start, f_stop, fs, no_samples, level):
+    n = np.arange(no_samples, dtype=np.float64)
+    rate = (f_stop - f_start)/(fs*no_samples)   # cycles/sample/sample
+    angle = 2*np.pi*n*(f_start/fs + rate*n/2)
+    iq = np.empty((no_samples, 2), np.float32)
+    np.cos(angle, out=iq[:, 0], casting='same_kind')
+    np.sin(angle, out=iq[:, 1], casting='same_kind')
+    ans = _toRaw(iq, FULL_SCALE*10**(level/20.0))
+    ans.flags.writeable = False
+    return ans
+
+def chirp(f_start, f_stop, fs, no_samples, level=0):
+    """a linear sweep from f_start to f_stop MHz, fs in MHz, as
+       interleaved int16 with its peak at level dBFS"""
+    return _chirp(f_start, f_stop, fs, no_samples, level)
+
+@lru_cache(CACHE_SIZE)
+def _noise(no_samples, level, seed):
+    rng = np.random.default_rng(seed)
+    iq = rng.standard_normal((no_samples, 2), np.float32)
+    iq *= np.sqrt(0.5)                # unit rms for I and Q together
+    iq = np.clip(iq, -1/10**(level/20.0), 1/10**(level/20.0), out=iq)
+    ans = _toRaw(iq, FULL_SCALE*10**(level/20.0))
+    ans.flags.writeable = False
+    return ans
+
+def noise(no_samples, level=-12, seed=None):
+    """gaussian noise with its rms at level dBFS as interleaved int16
+       peaks are clipped at full scale, only seeded noise is cached"""
+    if seed is None:
+        return _noise.__wrapped__(no_samples, level, None)
+    return _noise(no_samples, level, seed)
+
+def toneBlocks(freqs, fs, block_size, amps=None, phases=None, level=0):
+    """an endless generator of block_size blocks of interleaved int16
+       with the phase of each tone continuing from block to block"""
+    freqs = _tuple(freqs, 1, 0)
+    amps = _tuple(amps, len(freqs), 1.0)
+    phases = np.radians(_tuple(phases, len(freqs), 0.0))
+    cycles = np.array(freqs)/fs
+    scale = FULL_SCALE*10**(level/20.0)/sum(amps)
+    logging.debug('tone blocks: {:d} tones'.format(len(freqs)))
+    iq = np.empty((block_size, 2), np.float32)
+    while True:
+        iq.fill(0)
+        for k in range(len(freqs)):
+            _addTone(iq, cycles[k], phases[k], amps[k])
+        yield _toRaw(iq, scale)
+        # the next block starts where this one ended, modulo a cycle
+        phases = (phases + 2*np.pi*((cycles*block_size) % 1)) % (2*np.pi)
+
+def clearCache():
+    """discard the cached waveforms"""
+    for fn in (_multiTone, _chirp, _noise):
+        fn.cache_clear()
@@ -0,0 +1,98 @@
+"""
+    Using unittest to validate code for the dds tone model in pluto_dds
+    No device is needed, the simulated backend stands in for one
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import pluto_dds
+from pluto import iio_context
+from pluto.pluto_sdr import PlutoSdr
+
+SIM_ID = 'sim:latency=0'
+
+class TestDdsSim(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        self.sdr = PlutoSdr(SIM_ID)
+
+    def tearDown(self):
+        self.sdr.close()
+        iio_context.clearContexts()    # each test has a new device
+
+    # everything starting test is run, but in no guaranteed order
+    def testDdsModel(self):
+        """confirm dds values are held locally with the firmware steps"""
+        tone = self.sdr.dds.t1
+        tone.setFreq(1.2345)
+        count = self.sdr.ctx.round_trips
+        tone.setFreq(-2.5)
+        self.assertEqual(self.sdr.ctx.round_trips - count, 3,
+                         'I and Q freq, then only the Q phase changes')
+        tone.setFreq(-2.5)
+        npt.assert_almost_equal(tone.frequency, -2.499881, decimal=6,
+                                err_msg='quantised by the firmware')
+        self.assertEqual(self.sdr.ctx.round_trips - count, 3, 'unaltered')
+        tone.phase = 10.001
+        self.assertTrue(self.sdr.dds.verify(), 'values held by the device')
+        tone.q_ch.attrs['phase'].value = '0'        # altered elsewhere
+        self.assertFalse(tone.verify(), 'mismatch found')
+        self.assertEqual(tone.getPhase('Q'), 0, 'value read back')
+
+    def testDdsScale(self):
+        """confirm the amplitude held has the firmware scale steps"""
+        tone = self.sdr.dds.t1
+        tone.amplitude = 0.3
+        npt.assert_almost_equal(tone.amplitude, 0.299987, decimal=7,
+                                err_msg='1.14 fixed point, read truncated')
+        self.assertTrue(tone.verify(), 'held as the device')
+
+    def testDdsInterpolation(self):
+        """confirm the dds range follows the tx interpolation"""
+        sdr = self.sdr
+        sdr.dds.t1.setFreq(3.0)
+        sdr.tx_interpolation = True          # 3.84MHz at the dac output
+        with self.assertRaises(ValueError, msg='beyond Fs/2'):
+            sdr.dds.t1.setFreq(3.0)
+        sdr.dds.t1.setFreq(1.5)
+        npt.assert_almost_equal(sdr.dds.t1.frequency, 1.499964, decimal=6,
+                                err_msg='quantised at the new rate')
+        self.assertTrue(sdr.dds.verify(), 'held as the device')
+
+    def testDdsSchedule(self):
+        """confirm scheduled steps are planned and written in order"""
+        dds = self.sdr.dds
+        steps = [(0.002*k, 1 + 0.5*k, -2.0, -6, (0, 90)) for k in range(5)]
+        schedule = dds.schedule(steps)
+        schedule.wait()
+        self.assertEqual(schedule.done, 5, 'all steps written')
+        self.assertEqual([len(w) for t, w in schedule.plan][1:], [2]*4,
+                         'only the f1 I and Q writes after the first step')
+        self.assertTrue(np.all(schedule.jitter>=0), 'timing measured')
+        npt.assert_almost_equal(dds.t1.frequency, 3.0, decimal=3,
+                                err_msg='last step')
+        self.assertEqual(dds.t2.phase, 90, 'phase for each tone')
+        self.assertTrue(dds.verify(), 'device holds the last step')
+        with self.assertRaises(ValueError, msg='checked when planned'):
+            dds.schedule([(0, 100, None, None, None)])
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting the dds model on the simulated backend in module:\n',
+          path.abspath(pluto_dds.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
@@ -8,7 +8,17 @@ from __future__ import print_function
 
 import logging
 
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
 import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
 from pluto import readFilter
 
 TEST_FILE = 'test/LTE1p4_MHz'
@@ -36,12 +46,52 @@ class TestFilterRead(unittest.TestCase):
         self.assertEqual(res['ADC'], 92.16, 'reading ADC info')
 
         self.assertEqual(len(res['rx_taps']), 128, 'no of taps in rx fir')
-        self.assertListEqual(res['rx_taps'][:8], RX_TAPS, 'some rx taps')
-        self.assertListEqual(res['rx_taps'][-8:], 
+        npt.assert_array_equal(res['rx_taps'][:8], RX_TAPS, 'some rx taps')
+        npt.assert_array_equal(res['rx_taps'][-8:], 
                RX_TAPS[::-1], 'reverse symmetric rx taps at the end')
 
         self.assertEqual(len(res['tx_taps']), 128, 'no of taps in tx fir')
-        self.assertListEqual(res['tx_taps'][:8], TX_TAPS, 'some tx taps')
+        npt.assert_array_equal(res['tx_taps'][:8], TX_TAPS, 'some tx taps')
+        self.assertEqual(res['tx_taps'].dtype, np.int16, 'taps as int16')
+
+    def testCache(self):
+        """confirm a file is parsed once and its taps protected"""
+        readFilter.clearCache()
+        res = readFilter.readFilter(TEST_FILE)
+        res['rx_taps'][:] = 0           # altering the result given
+        again = readFilter.readFilter(TEST_FILE)
+        self.assertEqual(readFilter._parseFilter.cache_info().hits, 1,
+                         'second read from the cache')
+        npt.assert_array_equal(again['rx_taps'][:8], RX_TAPS,
+                               'cached taps unaltered')
+
+    def testModified(self):
+        """confirm a file with a new modification time is parsed again"""
+        readFilter.clearCache()
+        folder = tempfile.mkdtemp()
+        try:
+            filename = shutil.copy(TEST_FILE + '.ftr', folder)
+            readFilter.readFilter(filename)
+            readFilter.readFilter(filename)
+            mtime = os.path.getmtime(filename)
+            os.utime(filename, (mtime + 10, mtime + 10))     # touched
+            res = readFilter.readFilter(filename)
+            info = readFilter._parseFilter.cache_info()
+            self.assertEqual((info.hits, info.misses), (1, 2),
+                             'parsed again once modified')
+            npt.assert_array_equal(res['rx_taps'][:8], RX_TAPS, 'same taps')
+        finally:
+            shutil.rmtree(folder)
+
+    def testImports(self):
+        """confirm parsing loads none of the heavy dependencies"""
+        code = ('import sys, pluto, pluto.pluto_sdr, pluto.fir_tools;'
+                'from pluto import readFilter;'
+                'readFilter.readFilter("{:s}");'
+                'print(*sorted(m for m in ("iio", "scipy", "matplotlib")'
+                ' if m in sys.modules))').format(TEST_FILE)
+        out = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(out.strip(), b'', 'loaded only when used')
         
         
 if __name__=='__main__':
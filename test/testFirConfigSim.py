@@ -0,0 +1,129 @@
+"""
+    Using unittest to validate code for FirConfig class in pluto_fir
+    No device is needed, the simulated backend stands in for one
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import pluto_fir
+from pluto import iio_context
+from pluto.pluto_sdr import PlutoSdr
+from pluto.pluto_fir import FirConfig, NO_SLOTS
+
+SIM_ID = 'sim:latency=0'
+COEFFS = np.arange(1, 17)       # 16 taps, the MSB always 0
+
+class TestFirConfigSim(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        self.sdr = PlutoSdr(SIM_ID)
+        self.phy = self.sdr.phy
+        self.fir = FirConfig(self.phy)
+        # count the register accesses
+        self.writes = self.reads = 0
+        reg_write, reg_read = self.phy.reg_write, self.phy.reg_read
+        def countWrite(reg, value):
+            self.writes += 1
+            reg_write(reg, value)
+        def countRead(reg):
+            self.reads += 1
+            return reg_read(reg)
+        self.phy.reg_write, self.phy.reg_read = countWrite, countRead
+
+    def tearDown(self):
+        self.sdr.close()
+        iio_context.clearContexts()
+
+    def regWrites(self, func, *args):
+        """the registers written by func(*args)"""
+        count = self.writes
+        func(*args)
+        return self.writes - count
+
+    def regReads(self, func, *args):
+        """the registers read by func(*args), and what it returns"""
+        count = self.reads
+        ans = func(*args)
+        return self.reads - count, ans
+
+    def held(self):
+        """the rx coeffs held by the sim device"""
+        return np.trim_zeros(self.phy.coeffs['rx'])
+
+    # everything starting test is run, but in no guaranteed order
+    def testFullUpload(self):
+        """confirm all slots are written when the fir is not known"""
+        # per slot an address and a push, the lsb when it alters and the
+        # msb once, with the clock on and the end of the upload
+        self.assertEqual(self.regWrites(self.fir.writeRx, COEFFS),
+                         2*NO_SLOTS + 17 + 1 + 2, 'data regs deduplicated')
+        npt.assert_array_equal(self.held(), COEFFS, 'registers hold coeffs')
+
+    def testTrailingZeros(self):
+        """confirm slots beyond the last and new coeffs are skipped"""
+        self.fir.writeRx(COEFFS)
+        self.assertEqual(self.regWrites(self.fir.writeRx, COEFFS[:8]),
+                         2*16 + 9 + 1 + 2, 'old coeffs cleared')
+        npt.assert_array_equal(self.held(), COEFFS[:8], 'shorter coeffs')
+        self.assertEqual(self.regWrites(self.fir.writeRx, COEFFS[:8]),
+                         2*8 + 8 + 1 + 2, 'only the used slots')
+        npt.assert_array_equal(self.held(), COEFFS[:8], 'unaltered')
+
+    def testDiffUpload(self):
+        """confirm diff writes only the slots altered"""
+        self.fir.writeRx(COEFFS)
+        coeffs = COEFFS.copy()
+        coeffs[[3, 9]] = [-100, -200]
+        self.assertEqual(self.regWrites(self.fir.writeRx, coeffs, True),
+                         2*2 + 2 + 1 + 2, 'slots 3 and 9, one msb')
+        npt.assert_array_equal(self.held(), coeffs, 'registers updated')
+        self.assertEqual(self.regWrites(self.fir.writeRx, coeffs, True), 0,
+                         'unchanged, nothing written')
+        npt.assert_array_equal(self.held(), coeffs, 'unaltered')
+
+    def testReadCache(self):
+        """confirm readback uses the coeffs uploaded until refreshed"""
+        self.fir.writeRx(COEFFS)
+        reads, coeffs = self.regReads(self.fir.readRx)
+        self.assertEqual(reads, 0, 'held since the upload')
+        npt.assert_array_equal(coeffs, COEFFS, 'values uploaded')
+        reads, coeffs = self.regReads(self.fir.readRx, True)
+        self.assertEqual(reads, 2*NO_SLOTS, 'refresh reads the device')
+        npt.assert_array_equal(coeffs, COEFFS, 'values read')
+        self.assertEqual(self.regReads(self.fir.readRx)[0], 0, 'held again')
+        self.fir.invalidate()
+        reads, coeffs = self.regReads(self.fir.readRx)
+        self.assertEqual(reads, 2*NO_SLOTS, 'read after invalidate')
+        npt.assert_array_equal(coeffs, COEFFS, 'values read')
+        npt.assert_array_equal(self.fir.readTx(), [], 'tx path separate')
+
+    def testFirRegisters(self):
+        """confirm coefficients written by FirConfig are read back"""
+        fir = self.fir
+        coeffs = [5, -21, -51, -120, -212, -338, -471, -599]*2
+        fir.writeRx(coeffs)
+        npt.assert_array_equal(fir.readRx(refresh=True), coeffs,
+                               'rx coeffs read back')
+        npt.assert_array_equal(fir.readTx(refresh=True), [],
+                               'tx coeffs unaltered')
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting FirConfig on the simulated backend in module:\n',
+          path.abspath(pluto_fir.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+    Using unittest to validate code for fir_emulation
+    No device is needed, the taps are from the test ftr file
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import fir_emulation
+from pluto import readFilter
+from pluto.fir_emulation import FirEmulator
+
+TEST_FILE = 'test/LTE1p4_MHz'
+
+class TestFirEmulation(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        self.ftr = readFilter.readFilter(TEST_FILE)
+        self.x = np.random.default_rng(1).standard_normal(5000) \
+                 + 1j*np.random.default_rng(2).standard_normal(5000)
+
+    def tearDown(self):
+        pass
+
+    # everything starting test is run, but in no guaranteed order
+    def testConvolution(self):
+        """confirm the output is the scaled and decimated convolution"""
+        rx = FirEmulator.fromFilter(self.ftr, 'rx')
+        self.assertEqual(rx.factor, 4, 'decimation from file')
+        expected = np.convolve(self.x, self.ftr['rx_taps']/2**15/4)
+        npt.assert_allclose(rx.process(self.x), expected[:5000:4],
+                            atol=1e-9, err_msg='-12dB gain, 4 decimation')
+
+    def testBlocks(self):
+        """confirm state carried across blocks of any size"""
+        whole = FirEmulator.fromFilter(TEST_FILE, 'rx').process(self.x)
+        rx = FirEmulator.fromFilter(TEST_FILE, 'rx')
+        parts = np.concatenate([rx.process(self.x[k:k + 333])
+                                for k in range(0, len(self.x), 333)])
+        npt.assert_allclose(parts, whole, atol=1e-9, err_msg='same output')
+
+    def testShortBlocks(self):
+        """confirm empty blocks and those shorter than the taps are filtered"""
+        whole = FirEmulator.fromFilter(TEST_FILE, 'rx').process(self.x[:200])
+        rx = FirEmulator.fromFilter(TEST_FILE, 'rx')
+        self.assertEqual(len(rx.process(self.x[:0])), 0, 'empty first block')
+        sizes = [1, 2, 0, 3, 5, 7, 11, 171]
+        edges = np.cumsum([0] + sizes)
+        parts = [rx.process(self.x[a:b]) for a, b in zip(edges, edges[1:])]
+        npt.assert_allclose(np.concatenate(parts), whole, atol=1e-9,
+                            err_msg='same output')
+        tx = FirEmulator.fromFilter(self.ftr, 'tx')
+        self.assertEqual(len(tx.processRaw(np.zeros(0, np.int16))), 0,
+                         'empty raw block')
+
+    def testTx(self):
+        """confirm interpolation keeps unity gain"""
+        tx = FirEmulator.fromFilter(self.ftr, 'tx')
+        y = tx.process(np.ones(1000))
+        self.assertEqual(len(y), 4000, 'interpolated by 4')
+        npt.assert_allclose(np.abs(y[-100:]), 1, atol=0.05,
+                            err_msg='pass band gain')
+        raw = np.tile(np.array([1000, -1000], np.int16), 500)
+        out = tx.processRaw(raw)
+        self.assertEqual(out.dtype, np.int16, 'raw data')
+        self.assertEqual(len(out), 4000, 'interleaved IQ interpolated')
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting FIR emulation in module:\n',
+          path.abspath(fir_emulation.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+    Using unittest to validate code for fir_tools
+    No device is needed, scipy is used for the designs
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import fir_tools
+
+try:
+    import scipy
+except ImportError:
+    scipy = None
+
+@unittest.skipIf(scipy is None, 'scipy is needed for fir designs')
+class TestFirTools(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        fir_tools.clearCache()
+
+    def tearDown(self):
+        pass
+
+    # everything starting test is run, but in no guaranteed order
+    def testLegalTaps(self):
+        """confirm tap counts are rounded up to multiples of 16"""
+        self.assertEqual(fir_tools.legalTaps(1), 16, 'minimum')
+        self.assertEqual(fir_tools.legalTaps(100), 112, 'rounded up')
+        self.assertEqual(fir_tools.legalTaps(128), 128, 'maximum')
+        with self.assertRaises(ValueError, msg='too many taps'):
+            fir_tools.legalTaps(129)
+
+    def testDesign(self):
+        """confirm designs are int16 taps with their response"""
+        ans = fir_tools.design('lpf', 100, 0.25, gain=4)
+        self.assertEqual(ans['taps'].dtype, np.int16, 'for FirConfig')
+        self.assertEqual(len(ans['taps']), 112, 'legal length')
+        npt.assert_allclose(np.abs(ans['response'][[0, -1]]), [4, 0],
+                            atol=1e-3, err_msg='dc gain and stop band')
+        ans = fir_tools.design('HPF', 64, 0.5)
+        npt.assert_allclose(np.abs(ans['response'][[0, -1]]), [0, 1],
+                            atol=1e-3, err_msg='even length high pass')
+        ans = fir_tools.design('bpf', 128, (0.2, 0.4))
+        centre = np.argmin(np.abs(ans['freqs'] - 0.3))
+        npt.assert_allclose(np.abs(ans['response'][[0, centre, -1]]),
+                            [0, 1, 0], atol=1e-2, err_msg='band pass')
+        with self.assertRaises(ValueError, msg='taps beyond int16'):
+            fir_tools.design('lpf', 16, 0.9, gain=4)
+
+    def testCache(self):
+        """confirm a design is made once and protected"""
+        ans = fir_tools.design('lpf', 64, 0.25)
+        ans['taps'] = None                # altering the result given
+        again = fir_tools.design('lpf', 64, 0.25)
+        self.assertEqual(fir_tools._design.cache_info().hits, 1, 'cached')
+        self.assertEqual(len(again['taps']), 64, 'cached design unaltered')
+        self.assertFalse(again['taps'].flags.writeable, 'read only')
+        npt.assert_allclose(fir_tools.lpf(65, 0.25), fir_tools.lpf(65, 0.25),
+                            err_msg='float designs')
+
+    def testMultiBand(self):
+        """confirm band edges may be given as a list or an array"""
+        from scipy import signal as sig
+        edges = [0.2, 0.4]
+        npt.assert_allclose(fir_tools.lpf(31, edges),
+                            sig.firwin(31, edges, window='hamming'),
+                            err_msg='as firwin')
+        npt.assert_allclose(fir_tools.hpf(31, np.array(edges), 'hann'),
+                            fir_tools.hpf(31, tuple(edges), 'hann'),
+                            err_msg='array band edges')
+        self.assertEqual(fir_tools._firwin.cache_info().hits, 1, 'cached')
+        ans = fir_tools.design('bpf', 128, np.array([0.2, 0.4]))
+        self.assertEqual(ans['cutoff'], (0.2, 0.4), 'held as a tuple')
+
+class TestResponse(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+
+    def testBatch(self):
+        """confirm each row of a tap set has its own response"""
+        taps = np.zeros((3, 64))
+        taps[0, 0] = 1                    # all pass
+        taps[1, :2] = 0.5                 # zero at nyquist
+        taps[2, 10] = 1                   # a delay of 10
+        freqs, mag, phase = fir_tools.freqResponse(taps, 256)
+        self.assertEqual(mag.shape, (3, 257), 'rows of 0 to nyquist')
+        self.assertIs(freqs, fir_tools.freqGrid(256), 'grid reused')
+        npt.assert_allclose(mag[0], 0, atol=1e-9, err_msg='all pass')
+        npt.assert_allclose(mag[1, [0, -1]], [0, fir_tools.MIN_DB],
+                            atol=1e-6, err_msg='dc and nyquist')
+        npt.assert_allclose(phase[2], -10*np.pi*freqs, atol=1e-9,
+                            err_msg='linear phase')
+
+    def testInt16(self):
+        """confirm int16 taps are scaled and long taps are exact"""
+        h = fir_tools.response(np.array([0x4000, 0x4000], np.int16), 8)
+        npt.assert_allclose(np.abs(h[0]), 1, err_msg='1.15 fixed point')
+        taps = np.random.default_rng(1).standard_normal(100)
+        n = np.arange(100)
+        expected = [np.sum(taps*np.exp(-1j*np.pi*f*n))
+                    for f in fir_tools.freqGrid(16)]
+        npt.assert_allclose(fir_tools.response(taps, 16), expected,
+                            atol=1e-9, err_msg='more taps than the grid')
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting FIR designs in module:\n',
+          path.abspath(fir_tools.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+    Using unittest to validate code for iio_cache
+    No device is needed, the simulated backend stands in for one
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import time
+import unittest
+
+from pluto import iio_cache
+from pluto import iio_context
+from pluto.iio_cache import AttrCache
+from pluto.pluto_sdr import PlutoSdr
+
+SIM_ID = 'sim:latency=0'
+
+class TestAttrCache(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        self.sdr = PlutoSdr(SIM_ID)
+        self.ctx = self.sdr.ctx
+        self.lo = self.sdr.rx_lo.attrs['frequency']
+        self.freq = self.sdr.dds.t1.i_ch.attrs['frequency']
+
+    def tearDown(self):
+        self.sdr.close()
+        iio_context.clearContexts()
+
+    def trips(self, func, *args):
+        """the round trips taken by func(*args)"""
+        count = self.ctx.round_trips
+        func(*args)
+        return self.ctx.round_trips - count
+
+    # everything starting test is run, but in no guaranteed order
+    def testDisabled(self):
+        """confirm every read goes to the device when disabled"""
+        cache = AttrCache()
+        self.assertEqual(cache.read(self.lo), self.lo.value, 'device value')
+        self.assertEqual(self.trips(cache.read, self.lo), 1, 'not held')
+
+    def testRead(self):
+        """confirm a value is read once and then held"""
+        cache = AttrCache(True)
+        self.assertEqual(self.trips(cache.read, self.lo), 1, 'first read')
+        self.assertEqual(self.trips(cache.read, self.lo), 0, 'held')
+
+    def testTtl(self):
+        """confirm a held value expires after the ttl"""
+        cache = AttrCache(True, ttl=0.05)
+        cache.read(self.lo)
+        self.assertEqual(self.trips(cache.read, self.lo), 0, 'within ttl')
+        time.sleep(0.06)
+        self.assertEqual(self.trips(cache.read, self.lo), 1, 'expired')
+        self.assertEqual(self.trips(cache.read, self.lo), 0, 'held again')
+
+    def testInvalidate(self):
+        """confirm only the attr invalidated is read again"""
+        cache = AttrCache(True)
+        cache.read(self.lo)
+        cache.read(self.freq)
+        cache.invalidate(self.lo)
+        self.assertEqual(self.trips(cache.read, self.lo), 1, 'invalidated')
+        self.assertEqual(self.trips(cache.read, self.freq), 0, 'still held')
+        cache.invalidate()
+        self.assertEqual(self.trips(cache.read, self.freq), 1, 'all dropped')
+
+    def testClear(self):
+        """confirm clear() drops every value held"""
+        cache = AttrCache(True)
+        cache.read(self.lo)
+        cache.read(self.freq)
+        cache.clear()
+        self.assertEqual(self.trips(cache.read, self.lo)
+                         + self.trips(cache.read, self.freq), 2, 'read again')
+
+    def testWriteThrough(self):
+        """confirm a write reaches the device and the value it holds is read"""
+        cache = AttrCache(True)
+        cache.read(self.freq)
+        self.assertEqual(self.trips(cache.write, self.freq, '1000000'), 1,
+                         'written')
+        value = cache.read(self.freq)
+        self.assertEqual(value, self.freq.value, 'as the device holds')
+        self.assertNotEqual(value, '1000000', 'quantised by the firmware')
+        self.assertEqual(self.trips(cache.read, self.freq), 0, 'then held')
+
+    def testAgcGain(self):
+        """confirm the rx gain is cached only when set manually"""
+        sdr = PlutoSdr(SIM_ID, cache=True)
+        try:
+            sdr.rx_gain = 30
+            sdr.rx_gain
+            self.assertEqual(self.trips(lambda: sdr.rx_gain), 0, 'manual')
+            sdr.rx_gain = None
+            sdr.rx_gain
+            self.assertEqual(self.trips(lambda: sdr.rx_gain), 1,
+                             'follows the agc')
+        finally:
+            sdr.close()
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting attribute cache in module:\n',
+          path.abspath(iio_cache.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
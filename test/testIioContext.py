@@ -0,0 +1,112 @@
+"""
+    Using unittest to validate code for iio_context
+    No device is needed, the simulated backend stands in for one
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import threading
+import unittest
+
+from pluto import iio_context
+from pluto.iio_context import getContext, releaseContext, refCount
+from pluto.pluto_sdr import PlutoSdr
+
+SIM_ID = 'sim:latency=0'
+
+class TestIioContext(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        iio_context.clearContexts()
+
+    def tearDown(self):
+        iio_context.clearContexts()
+
+    # everything starting test is run, but in no guaranteed order
+    def testShared(self):
+        """confirm one context is shared and reference counted"""
+        ctx = getContext(SIM_ID)
+        with PlutoSdr(SIM_ID) as sdr:
+            self.assertIs(sdr.ctx, ctx, 'shared context')
+            self.assertEqual(refCount(SIM_ID), 2, 'two users')
+        self.assertIsNone(sdr.ctx, 'closed')
+        sdr.close()
+        self.assertEqual(refCount(SIM_ID), 1, 'closed only once')
+        releaseContext(SIM_ID)
+        self.assertIs(getContext(SIM_ID), ctx, 'kept for reuse')
+        releaseContext(SIM_ID, keep=False)
+        self.assertIsNot(getContext(SIM_ID), ctx, 'discarded when unused')
+        releaseContext(SIM_ID)
+        self.assertEqual(refCount(SIM_ID), 0, 'all released')
+
+    def testReconnect(self):
+        """confirm a context is replaced on reconnect or failed check"""
+        ctx = getContext(SIM_ID)
+        self.assertTrue(iio_context.isHealthy(ctx), 'answers a read')
+        iio_context.reconnect(SIM_ID)
+        new = getContext(SIM_ID)
+        self.assertIsNot(new, ctx, 'reconnected')
+        new.devices = []              # no longer answering
+        self.assertFalse(iio_context.isHealthy(new), 'failed check')
+        self.assertIs(getContext(SIM_ID), new, 'unchecked')
+        self.assertIsNot(getContext(SIM_ID, check=True), new, 'checked')
+        for _ in range(4):
+            releaseContext(SIM_ID)
+        self.assertEqual(refCount(SIM_ID), 0, 'all released')
+
+    def testSdrCheck(self):
+        """confirm PlutoSdr checks a context it reuses"""
+        ctx = getContext(SIM_ID)
+        # the health check read fails
+        del ctx.find_device('ad9361-phy').attrs[iio_context.HEALTH_ATTR]
+        with PlutoSdr(SIM_ID, check=False) as sdr:
+            self.assertIs(sdr.ctx, ctx, 'unchecked')
+        with PlutoSdr(SIM_ID) as sdr:
+            self.assertIsNot(sdr.ctx, ctx, 'reconnected')
+            self.assertTrue(iio_context.isHealthy(sdr.ctx), 'answers')
+        releaseContext(SIM_ID)
+        self.assertEqual(refCount(SIM_ID), 0, 'all released')
+
+    def testThreads(self):
+        """confirm references are counted by concurrent users"""
+        def use():
+            for _ in range(200):
+                getContext(SIM_ID)
+                releaseContext(SIM_ID, keep=False)
+        threads = [threading.Thread(target=use) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(refCount(SIM_ID), 0, 'all released')
+        self.assertNotIn(SIM_ID, iio_context._contexts, 'discarded')
+
+    def testFailure(self):
+        """confirm a failed context raises and leaves no reference"""
+        with self.assertRaises(ValueError, msg='bad uri'):
+            PlutoSdr('sim:latency=bad')
+        self.assertEqual(refCount('sim:latency=bad'), 0, 'not counted')
+
+    def testResolve(self):
+        """confirm only .local host names are resolved, and cached"""
+        self.assertEqual(iio_context.resolveUri('ip:192.168.2.1'),
+                         'ip:192.168.2.1', 'an address')
+        self.assertEqual(iio_context.resolveUri(SIM_ID), SIM_ID, 'sim')
+        iio_context._resolved['test.local'] = ('192.168.2.1', 1e300)
+        self.assertEqual(iio_context.resolveUri('ip:test.local'),
+                         'ip:192.168.2.1', 'cached address')
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting context registry in module:\n',
+          path.abspath(iio_context.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+    Using unittest to validate code for iio_sim
+    No device is needed, the simulated backend stands in for one
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import iio_sim
+from pluto import iio_context
+from pluto.pluto_sdr import PlutoSdr
+
+SIM_ID = 'sim:latency=0'
+
+class TestIioSim(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        self.sdr = PlutoSdr(SIM_ID)
+
+    def tearDown(self):
+        self.sdr.close()
+        iio_context.clearContexts()    # each test has a new device
+
+    # everything starting test is run, but in no guaranteed order
+    def testContext(self):
+        """create a simulated context with the pluto devices"""
+        self.assertIsInstance(self.sdr.ctx, iio_sim.Context, 'sim backend')
+        for name in ('ad9361-phy', 'cf-ad9361-lpc', 'cf-ad9361-dds-core-lpc'):
+            self.assertIsNotNone(self.sdr.ctx.find_device(name), name)
+        self.assertEqual(iio_sim.parseUri('sim:latency=0.002,throughput=1e6'),
+                         {'latency':0.002, 'throughput':1e6}, 'uri options')
+
+    def testRoundTrips(self):
+        """confirm attribute access is counted"""
+        sdr = self.sdr
+        count = sdr.ctx.round_trips
+        sdr.rx_lo_freq = 430.1
+        npt.assert_almost_equal(sdr.rx_lo_freq, 430.1, decimal=6,
+                                err_msg='setting rx lo in MHz')
+        self.assertEqual(sdr.ctx.round_trips - count, 2, 'a write and a read')
+        sdr.sampling_frequency = 10
+        self.assertEqual(sdr.rxBBSampling(), 10.0, 'decimation off')
+        sdr.rx_decimation = True
+        self.assertEqual(sdr.rxBBSampling(), 1.25, 'decimation on')
+
+    def testCyclicTx(self):
+        """confirm a cyclic buffer can only be pushed once"""
+        sdr = self.sdr
+        count = sdr.writeTx(np.zeros(256, np.complex128))
+        self.assertEqual(count, 1024, 'bytes written')
+        with self.assertRaises(OSError, msg='pushed again'):
+            sdr._tx_buff.push()
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting simulated backend in module:\n',
+          path.abspath(iio_sim.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+    Using unittest to validate code for pluto_pool
+    No device is needed, the simulated backend stands in for several
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import time
+import unittest
+
+from pluto import pluto_pool
+from pluto import iio_context
+from pluto.pluto_pool import PlutoPool
+
+NO_DEVICES = 4
+# distinct uris so that each device has its own context
+SIM_IDS = ['sim:{:d},latency=0.02'.format(k) for k in range(NO_DEVICES)]
+
+class TestPlutoPool(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        self.pool = PlutoPool(SIM_IDS + ['sim:latency=bad'])
+
+    def tearDown(self):
+        self.pool.close()
+        iio_context.clearContexts()
+
+    # everything starting test is run, but in no guaranteed order
+    def testOpen(self):
+        """confirm a device that fails to open is reported"""
+        self.assertEqual(len(self.pool), NO_DEVICES + 1, 'a device per uri')
+        self.assertIsNone(self.pool.sdrs[-1], 'bad uri')
+        self.assertIn('sim:latency=bad', self.pool.errors, 'error by uri')
+
+    def testResults(self):
+        """confirm results are aligned with the uris"""
+        ans = self.pool.configure(rx_lo=430.1)
+        for k in range(NO_DEVICES):
+            self.assertAlmostEqual(ans[k]['rx_lo'], 430.1, 6, 'configured')
+        self.assertIsInstance(ans[-1], OSError, 'error in place')
+        ans = self.pool.readRx(1024)
+        self.assertEqual([len(x) for x in ans[:-1]], [2048]*NO_DEVICES,
+                         'a block from each device')
+        ans = self.pool.capture(1024, raw=True)
+        self.assertEqual(ans[0]['uri'], SIM_IDS[0], 'uri added')
+
+    def testParallel(self):
+        """confirm the devices are accessed concurrently"""
+        sdrs = self.pool.sdrs[:NO_DEVICES]
+        self.assertEqual(len(set(id(sdr.ctx) for sdr in sdrs)), NO_DEVICES,
+                         'a context for each device')
+        start = time.perf_counter()
+        for sdr in sdrs:
+            sdr.rx_lo_freq
+        serial = time.perf_counter() - start
+        start = time.perf_counter()
+        self.pool.map(lambda sdr: sdr.rx_lo_freq)
+        parallel = time.perf_counter() - start
+        # ideally 1/NO_DEVICES of the time, allowing for a loaded machine
+        self.assertLess(parallel, serial/2, 'not one at a time')
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting multiple devices in module:\n',
+          path.abspath(pluto_pool.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
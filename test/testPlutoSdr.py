@@ -101,6 +101,23 @@ class TestplutoSdr(unittest.TestCase):
         sdr.tx_gain = gain
         self.assertEqual(sdr.tx_gain, gain, 're-set to original gain')
 
+    def testConfigure(self):
+        """confirm bulk setting of parameters and the values returned"""
+        sdr = self.sdr
+        fs = sdr.sampling_frequency
+        lo = sdr.rx_lo_freq
+        ans = sdr.configure(fs=10, rx_lo=430.1, decimation=False, rx_gain=20)
+        self.assertEqual(ans['fs'], 10.0, 'Fs set in MHz')
+        npt.assert_almost_equal(ans['rx_lo'], 430.1, decimal=6,
+                                err_msg='setting rx lo in MHz')
+        self.assertFalse(ans['decimation'], 'decimation off')
+        self.assertEqual(ans['rx_gain'], 20.0, 'gain set in dB')
+        self.assertNotIn('tx_lo', ans, 'only values requested returned')
+        self.assertEqual(sdr.configure(fs=10, rx_lo=430.1),
+                         {'fs':10.0, 'rx_lo':ans['rx_lo']}, 'unchanged values')
+        sdr.configure(fs=fs, rx_lo=lo)
+        self.assertEqual(sdr.sampling_frequency, fs, 're-set to original')
+
     def testDdsControl(self):
         """confirm higher level control of DDS"""
         sdr = self.sdr
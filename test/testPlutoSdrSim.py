@@ -0,0 +1,125 @@
+"""
+    Using unittest to validate code for pluto_sdr
+    No device is needed, the simulated backend stands in for one
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import pluto_sdr
+from pluto import iio_context
+from pluto.pluto_sdr import PlutoSdr
+from pluto.controls import COMPLEX, COMPLEX64
+
+SIM_ID = 'sim:latency=0'
+LO = 433.920001             # not on a step of the LO synth
+
+class TestPlutoSdrSim(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        self.sdr = PlutoSdr(SIM_ID)
+
+    def tearDown(self):
+        self.sdr.close()
+        iio_context.clearContexts()    # each test has a new device
+
+    # everything starting test is run, but in no guaranteed order
+    def testConfigure(self):
+        """confirm a repeated configure() writes nothing"""
+        sdr = self.sdr
+        settings = {'fs':10, 'decimation':False, 'rx_bw':5, 'rx_lo':LO,
+                    'tx_lo':LO, 'rx_gain':20, 'tx_gain':-10.1}
+        ans = sdr.configure(**settings)
+        self.assertNotEqual(ans['rx_lo'], LO, 'quantised by the firmware')
+        npt.assert_almost_equal(ans['rx_lo'], LO, decimal=5,
+                                err_msg='nearest the synth can set')
+        writes, count = sdr.ctx.attr_writes, sdr.ctx.round_trips
+        self.assertEqual(sdr.configure(**settings), ans, 'values unaltered')
+        self.assertEqual(sdr.ctx.attr_writes - writes, 0, 'all writes skipped')
+        reads = sdr.ctx.round_trips - count
+        count = sdr.ctx.round_trips
+        for key, prop in sdr.CONFIG_ORDER:
+            if key in settings:
+                getattr(sdr, prop)
+        self.assertEqual(reads, sdr.ctx.round_trips - count + 1,
+                         'each read once, and the rx gain mode')
+        sdr.rx_lo_freq = 430                 # altered outside configure()
+        writes = sdr.ctx.attr_writes
+        self.assertEqual(sdr.configure(**settings), ans, 'restored')
+        self.assertEqual(sdr.ctx.attr_writes - writes, 1, 'only the rx lo')
+
+    def testRxData(self):
+        """confirm rx blocks are interleaved int16 IQ"""
+        data = self.sdr.readRx(1024)
+        self.assertEqual(data.dtype, np.int16, 'raw data')
+        self.assertEqual(len(data), 2048, 'interleaved IQ')
+        stream = self.sdr.rxStream(512)
+        self.assertEqual(len(next(stream)), 1024, 'stream block size')
+        stream.close()
+        self.assertFalse(self.sdr.rx_channels[0].enabled, 'closed stream')
+
+    def testRaw2Complex(self):
+        """confirm scaling and precision of raw to complex conversion"""
+        sdr = self.sdr
+        raw = np.array([2047, -2048, 1024, 0], np.int16)
+        iq = sdr.raw2complex(raw)
+        self.assertEqual(iq.dtype, COMPLEX, 'default complex type')
+        npt.assert_almost_equal(iq, [2047/2048 - 1j, 0.5], decimal=6,
+                                err_msg='scaled to +/-1.0')
+        out = np.empty(2, COMPLEX64)
+        iq = sdr.raw2complex(raw, out)
+        self.assertIs(iq, out, 'converted into the array given')
+        npt.assert_almost_equal(iq, [2047/2048 - 1j, 0.5], decimal=6,
+                                err_msg='single precision output')
+
+    def testStageTx(self):
+        """confirm staged tx data is aligned to the msb and rounded"""
+        sdr = self.sdr
+        out = np.empty(8, np.int16)
+        iq = np.array([0.3 - 0.7j, 1e-4 + 0.123456j, -0.5, 0.25j])
+        for samples in (iq, iq.astype(np.complex64)):
+            staged = sdr.stageTx(samples, out)
+            npt.assert_array_equal(staged, sdr.complex2raw(samples, 16),
+                                   'rounded as complex2raw')
+        scratch = sdr._tx_scratch[np.dtype(np.float64)]
+        sdr.stageTx(iq[:2], out)
+        self.assertIs(sdr._tx_scratch[np.dtype(np.float64)], scratch,
+                      'float scratch reused')
+        raw = np.array([2047, -2048, 1, 0], np.int16)
+        npt.assert_array_equal(sdr.stageTx(raw, out), raw*16, '12 bit raw')
+        npt.assert_array_equal(sdr.stageTx(raw, out, 16), raw, '16 bit raw')
+
+    def testUpdateTx(self):
+        """confirm updateTx() replaces the cyclic output in a new buffer"""
+        sdr = self.sdr
+        sdr.writeTx(np.zeros(256, np.complex128))
+        first = sdr._tx_buff
+        count = sdr.ctx.round_trips
+        iq = np.full(256, 0.5 - 0.25j)
+        self.assertEqual(sdr.updateTx(iq), 1024, 'bytes written')
+        self.assertIsNot(sdr._tx_buff, first, 'buffer recreated')
+        self.assertEqual(sdr.ctx.round_trips - count, 2,
+                         'create and push, the tx state is unaltered')
+        npt.assert_array_equal(np.frombuffer(sdr._tx_buff.read(), np.int16),
+                               sdr.complex2raw(iq, 16), 'staged data')
+        self.assertEqual(sdr.tx_state, 'dma', 'still transmitting')
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting PlutoSdr on the simulated backend in module:\n',
+          path.abspath(pluto_sdr.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
@@ -0,0 +1,92 @@
+"""
+    Using unittest to validate code for recorder
+    No device is needed, the simulated backend stands in for one
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import os
+import shutil
+import tempfile
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import recorder
+from pluto import iio_context
+from pluto.pluto_sdr import PlutoSdr
+from pluto.resampler import actualRate
+
+SIM_ID = 'sim:latency=0'
+BLOCK_SIZE = 1024
+NO_SAMPLES = 2500         # not a whole number of blocks
+
+class TestRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        self.sdr = PlutoSdr(SIM_ID)
+        self.dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dir, 'capture')
+        # the sim gives the same data for every block of a size
+        block = self.sdr.readRx(BLOCK_SIZE)
+        self.expected = np.tile(block, 3)[:2*NO_SAMPLES]
+
+    def tearDown(self):
+        self.sdr.close()
+        iio_context.clearContexts()
+        shutil.rmtree(self.dir)
+
+    # everything starting test is run, but in no guaranteed order
+    def testRaw(self):
+        """confirm a raw recording is loaded as written"""
+        info = recorder.record(self.sdr, self.filename, NO_SAMPLES,
+                               BLOCK_SIZE, desc='raw')
+        self.assertTrue(os.path.exists(self.filename + recorder.DATA_EXT),
+                        'data file')
+        ans = recorder.loadCapture(self.filename + '.anything')
+        self.assertEqual(ans['data'].dtype, np.int16, 'interleaved IQ')
+        npt.assert_array_equal(ans['data'], self.expected, 'rx data')
+        self.assertEqual(ans['bits'], self.sdr.no_bits, 'raw data has bits')
+        self.assertEqual(ans['no_samples'], NO_SAMPLES, 'length saved')
+        self.assertEqual(ans['desc'], 'raw', 'RF params saved')
+        self.assertEqual(ans['fs'], info['fs'], 'as returned')
+        del ans                   # release the memory mapped file
+
+    def testResampled(self):
+        """confirm the sidecar holds the rate the resampler gives"""
+        info = recorder.record(self.sdr, self.filename, 100, BLOCK_SIZE,
+                               fs_out=1.7)
+        ans = recorder.loadCapture(self.filename)
+        self.assertEqual(ans['fs'], info['fs'], 'saved')
+        self.assertEqual(ans['fs'], actualRate(self.sdr.rxBBSampling(), 1.7),
+                         'not the rate requested')
+        del ans
+
+    def testComplex(self):
+        """confirm a complex recording is converted and loaded"""
+        recorder.record(self.sdr, self.filename, NO_SAMPLES, BLOCK_SIZE,
+                        raw=False)
+        ans = recorder.loadCapture(self.filename)
+        self.assertEqual(ans['data'].dtype, self.sdr.complex_type,
+                         'complex samples')
+        npt.assert_array_equal(ans['data'],
+                               self.sdr.raw2complex(self.expected),
+                               'converted rx data')
+        self.assertNotIn('bits', ans, 'as capture(), only raw has bits')
+        del ans
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting recorder in module:\n', path.abspath(recorder.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
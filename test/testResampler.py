@@ -0,0 +1,116 @@
+"""
+    Using unittest to validate code for resampler
+    No device is needed, the simulated backend stands in for one
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import resampler
+from pluto.resampler import Resampler
+from pluto.pluto_sdr import PlutoSdr
+
+FS = 30.72            # MHz
+
+def tone(f, fs, n):
+    return np.exp(2j*np.pi*f*np.arange(n)/fs).astype(np.complex64)
+
+class TestResampler(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+
+    def tearDown(self):
+        pass
+
+    # everything starting test is run, but in no guaranteed order
+    def testRatio(self):
+        """confirm the rate is changed by the fraction up/down"""
+        rs = Resampler(FS, 1.0)
+        self.assertEqual((rs.up, rs.down), (25, 768), 'exact fraction')
+        y = rs.process(tone(0.1, FS, 76800))
+        self.assertEqual(len(y), 2500, 'output samples')
+        skip = rs.settling
+        npt.assert_allclose(np.abs(y[skip:]), 1, atol=1e-3,
+                            err_msg='pass band')
+        # the output is a tone at 0.1MHz of the 1MHz rate
+        npt.assert_allclose(y[skip + 10:]/y[skip + 9:-1],
+                            np.exp(2j*np.pi*0.1), atol=1e-3,
+                            err_msg='output frequency')
+
+    def testAliasing(self):
+        """confirm signals beyond the output nyquist are rejected"""
+        rs = Resampler(FS, 1.0)
+        y = rs.process(tone(3.0, FS, 76800))[rs.settling:]
+        self.assertLess(np.abs(y).max(), 10**(-60/20.0), 'stop band')
+
+    def testBlocks(self):
+        """confirm state carried across blocks of any size"""
+        x = tone(0.3, 2.0, 10000)
+        whole = Resampler(2.0, 5.0).process(x)
+        rs = Resampler(2.0, 5.0)
+        parts = np.concatenate([rs.process(x[k:k + 333])
+                                for k in range(0, len(x), 333)])
+        npt.assert_allclose(parts, whole, atol=1e-6, err_msg='same output')
+
+    def testEmpty(self):
+        """confirm an empty block gives no output and alters nothing"""
+        x = tone(0.3, 2.0, 1000)
+        whole = Resampler(2.0, 5.0).process(x)
+        rs = Resampler(2.0, 5.0)
+        self.assertEqual(len(rs.process(x[:0])), 0, 'no output')
+        parts = [rs.process(x[:500]), rs.process(x[:0]), rs.process(x[500:])]
+        npt.assert_allclose(np.concatenate(parts), whole, atol=1e-6,
+                            err_msg='state unaltered')
+        self.assertEqual(len(rs.processRaw(np.empty(0, np.int16))), 0,
+                         'no raw output')
+
+    def testActualRate(self):
+        """confirm the rate given when the fraction is approximate"""
+        rs = Resampler(FS, 1.7)
+        self.assertEqual(rs.fs_out, resampler.actualRate(FS, 1.7), 'as made')
+        self.assertAlmostEqual(rs.fs_out, FS*rs.up/rs.down, 12, 'up/down')
+        self.assertNotEqual(rs.fs_out, 1.7, 'within 50ppm')
+        self.assertLess(abs(rs.fs_out/1.7 - 1), 50e-6, 'within 50ppm')
+
+    def testRaw(self):
+        """confirm int16 IQ is resampled to int16 IQ"""
+        raw = np.zeros(2000, np.int16)
+        raw[0::2] = 1000
+        out = Resampler(4, 2).processRaw(raw)
+        self.assertEqual(out.dtype, np.int16, 'raw data')
+        self.assertEqual(len(out), 1000, 'interleaved IQ at half the rate')
+        npt.assert_array_equal(out[200::2], 1000, 'dc gain of 1')
+
+    def testCapture(self):
+        """confirm capture and rxStream give the rate asked for"""
+        with PlutoSdr('sim:') as sdr:
+            ans = sdr.capture(1000, fs_out=1.0)
+            self.assertEqual(ans['fs'], 1.0, 'resampled rate')
+            self.assertEqual(len(ans['data']), 1000, 'samples')
+            ans = sdr.capture(100, fs_out=1.7)
+            self.assertEqual(ans['fs'], resampler.actualRate(FS, 1.7),
+                             'the rate actually given')
+            stream = sdr.rxStream(3072, raw=True, fs_out=1.0)
+            sizes = [len(next(stream)) for _ in range(3)]
+            stream.close()
+            self.assertEqual(sum(sizes), 2*300, 'interleaved IQ')
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting resampler in module:\n',
+          path.abspath(resampler.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
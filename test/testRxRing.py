@@ -0,0 +1,113 @@
+"""
+    Using unittest to validate code for rx_ring
+    No device is needed, the simulated backend stands in for one
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import time
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import rx_ring
+from pluto import iio_context
+from pluto.rx_ring import RxRing
+from pluto.pluto_sdr import PlutoSdr
+
+BLOCK_SIZE = 256
+NO_BLOCKS = 4
+
+def numbered(stream):
+    """the rx blocks with their count in the first value"""
+    try:
+        for k, block in enumerate(stream):
+            block[0] = k
+            yield block
+    finally:
+        stream.close()
+
+def openSdr(uri):
+    """a sim PlutoSdr whose rx blocks can be identified"""
+    sdr = PlutoSdr(uri)
+    stream = sdr.rxStream
+    sdr.rxStream = lambda block_size: numbered(stream(block_size))
+    return sdr
+
+def fill(ring, no_blocks):
+    """wait for the thread to write no_blocks, then stop it"""
+    deadline = time.monotonic() + 5
+    while ring._head<no_blocks and time.monotonic()<deadline:
+        time.sleep(0.001)
+    ring.stop()
+
+class TestRxRing(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        self.sdrs = []
+
+    def tearDown(self):
+        for sdr in self.sdrs:
+            sdr.close()
+        iio_context.clearContexts()
+
+    def ring(self, uri):
+        self.sdrs.append(openSdr(uri))
+        return RxRing(self.sdrs[-1], BLOCK_SIZE, NO_BLOCKS)
+
+    # everything starting test is run, but in no guaranteed order
+    def testRead(self):
+        """confirm blocks are read in order when the consumer keeps up"""
+        with self.ring('sim:latency=0.005') as ring:
+            data = ring.read(6, timeout=5)
+            self.assertEqual(len(data), 6*2*BLOCK_SIZE, 'interleaved IQ')
+            npt.assert_array_equal(data[::2*BLOCK_SIZE], np.arange(6),
+                                   'consecutive blocks')
+            iq = ring.read(1, timeout=5, raw=False)
+            self.assertEqual(len(iq), BLOCK_SIZE, 'complex samples')
+        self.assertEqual(ring.overruns, 0, 'no overrun')
+        self.assertEqual(ring.dropped, 0, 'no block lost')
+        self.assertGreaterEqual(ring.high_water, 1, 'blocks waited')
+
+    def testTimeout(self):
+        """confirm read() waits no longer than the timeout"""
+        with self.ring('sim:latency=0.05') as ring:
+            with self.assertRaises(TimeoutError, msg='no block yet'):
+                ring.read(1, timeout=0.01)
+        with self.assertRaises(OSError, msg='stopped and empty'):
+            ring.read(1, timeout=0.01)
+
+    def testOverrun(self):
+        """confirm the counters match the blocks the consumer loses"""
+        ring = self.ring('sim:latency=0')
+        ring.start()
+        fill(ring, 20)
+        usable = NO_BLOCKS - 1           # one slot is being written
+        self.assertEqual(ring.dropped, ring._head - usable, 'blocks lost')
+        self.assertEqual(ring.overruns, 1, 'a single overrun')
+        self.assertEqual(ring.high_water, usable, 'only usable blocks')
+        self.assertEqual(ring.available(), usable, 'blocks to read')
+        data = ring.read(usable)
+        npt.assert_array_equal(data[::2*BLOCK_SIZE],
+                               ring.dropped + np.arange(usable),
+                               'first block after those dropped')
+        ring.start()
+        fill(ring, ring._head + 10)
+        self.assertEqual(ring.overruns, 2, 'counted for each occurrence')
+        self.assertEqual(ring.dropped, ring._head - 2*usable, 'blocks lost')
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting rx ring in module:\n', path.abspath(rx_ring.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
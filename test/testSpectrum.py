@@ -0,0 +1,81 @@
+"""
+    Using unittest to validate code for spectrum
+    No device is needed, the data is generated
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import spectrum
+from pluto import waveforms
+from pluto.spectrum import WelchPsd
+
+FS = 10.0             # MHz
+NFFT = 256
+
+class TestSpectrum(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+
+    def tearDown(self):
+        pass
+
+    # everything starting test is run, but in no guaranteed order
+    def testFullScale(self):
+        """confirm a full scale tone is 0dBFS at its frequency"""
+        raw = waveforms.multiTone(2.5, FS, 0x2000)    # bin centred
+        welch = WelchPsd(NFFT)
+        welch.update(raw)
+        psd = welch.psd()
+        peak = np.argmax(psd)
+        npt.assert_almost_equal(psd[peak], 0, decimal=1,
+                                err_msg='full scale tone')
+        npt.assert_almost_equal(welch.freqs(FS)[peak], 2.5, decimal=6,
+                                err_msg='tone frequency')
+        self.assertEqual(welch.count, 0x2000//(NFFT//2) - 1, 'overlapped')
+
+    def testBlocks(self):
+        """confirm blocks of any size give the same average"""
+        raw = waveforms.noise(0x3000, level=-10, seed=1)
+        whole = WelchPsd(NFFT)
+        whole.update(raw)
+        parts = WelchPsd(NFFT)
+        for start in range(0, len(raw), 2*300):       # not segment aligned
+            parts.update(raw[start:start + 2*300])
+        self.assertEqual(parts.count, whole.count, 'same segments')
+        npt.assert_allclose(parts.psd(), whole.psd(), atol=1e-3,
+                            err_msg='same average')
+        parts.reset()
+        self.assertEqual(parts.count, 0, 'reset')
+
+    def testNoiseLevel(self):
+        """confirm noise density summed over the bins is the rms level"""
+        welch = WelchPsd(NFFT, alpha=0.5)
+        for seed in range(4):
+            welch.update(waveforms.noise(0x4000, level=-20, seed=seed))
+        # the window gain is normalised for tones, correct for noise
+        w = np.hanning(NFFT)
+        enbw = NFFT*np.sum(w**2)/np.sum(w)**2
+        total = np.sum(10**(welch.psd()/10))/enbw
+        npt.assert_allclose(10*np.log10(total), -20, atol=0.2,
+                            err_msg='noise power')
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting spectrum in module:\n',
+          path.abspath(spectrum.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+    Using unittest to validate code for sweep
+    No device is needed, the simulated backend stands in for one
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import sweep
+from pluto import iio_context
+from pluto.pluto_sdr import PlutoSdr
+
+SIM_ID = 'sim:latency=0'
+
+class TestSweep(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        self.sdr = PlutoSdr(SIM_ID)
+
+    def tearDown(self):
+        self.sdr.close()
+        iio_context.clearContexts()    # each test has a new device
+
+    # everything starting test is run, but in no guaranteed order
+    def testSweep(self):
+        """confirm the sweep steps abut across the span"""
+        self.sdr.sampling_frequency = 10
+        freqs, psd = self.sdr.sweep(400, 430, no_samples=1000)
+        self.assertEqual(len(freqs), len(psd), 'a power for each frequency')
+        npt.assert_almost_equal(np.diff(freqs), 0.01, decimal=9,
+                                err_msg='uniform bin spacing')
+        self.assertEqual(freqs[0], 400, 'start of span')
+        self.assertLessEqual(freqs[-1], 430, 'end of span')
+        npt.assert_almost_equal(self.sdr.rx_lo_freq, 428, decimal=6,
+                                err_msg='lo at the centre of the last step')
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting the sweep in module:\n',
+          path.abspath(sweep.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
@@ -0,0 +1,98 @@
+"""
+    Using unittest to validate code for tx_stream
+    No device is needed, the simulated backend stands in for one
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import time
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import tx_stream
+from pluto import iio_context
+from pluto.pluto_sdr import PlutoSdr
+from pluto.tx_stream import KERNEL_BUFFERS
+
+SIM_ID = 'sim:latency=0.002'      # pushes are slower than staging
+BLOCK_SIZE = 256
+NO_BLOCKS = 5
+
+def slowBlocks(pause_at):
+    """numbered raw blocks with a pause before block pause_at"""
+    for k in range(NO_BLOCKS):
+        if k==pause_at:
+            time.sleep(0.05)
+        yield np.full(2*BLOCK_SIZE, k, np.int16)
+
+class TestTxStream(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+        self.sdr = PlutoSdr(SIM_ID)
+        self.pushed = []
+        # keep a copy of the data in each push to the dac
+        create = self.sdr.createBuffer
+        def createBuffer(device, no_samples, cyclic=False):
+            buff = create(device, no_samples, cyclic)
+            push = buff.push
+            def recordPush(*args):
+                push(*args)
+                self.pushed.append(np.frombuffer(buff.read(), np.int16))
+            buff.push = recordPush
+            return buff
+        self.sdr.createBuffer = createBuffer
+
+    def tearDown(self):
+        self.sdr.close()
+        iio_context.clearContexts()
+
+    def firstValues(self):
+        """the first value of each block from the source, as raw 12 bit"""
+        return [block[0] >> 4 for block in self.pushed[:-KERNEL_BUFFERS]]
+
+    # everything starting test is run, but in no guaranteed order
+    def testOrder(self):
+        """confirm all the blocks of an array are pushed in order"""
+        data = np.repeat(np.arange(NO_BLOCKS, dtype=np.int16), 2*BLOCK_SIZE)
+        stream = self.sdr.txStream(data[:-BLOCK_SIZE], BLOCK_SIZE)
+        self.assertEqual(stream.blocks, NO_BLOCKS, 'blocks pushed')
+        self.assertEqual(self.firstValues(), list(range(NO_BLOCKS)),
+                         'in order')
+        npt.assert_array_equal(self.pushed[NO_BLOCKS - 1][BLOCK_SIZE:], 0,
+                               'short last block padded')
+        self.assertEqual(len(self.pushed), NO_BLOCKS + KERNEL_BUFFERS,
+                         'drained by zero blocks')
+        npt.assert_array_equal(self.pushed[NO_BLOCKS:], 0, 'zero blocks')
+        self.assertEqual(stream.underruns, 0, 'staged ahead')
+        self.assertEqual(self.sdr.tx_state, 'off', 'tx off when done')
+
+    def testUnderrun(self):
+        """confirm a late block is counted once as an underrun"""
+        stream = self.sdr.txStream(slowBlocks(3), BLOCK_SIZE)
+        self.assertEqual(self.firstValues(), list(range(NO_BLOCKS)),
+                         'in order')
+        self.assertEqual(stream.underruns, 1, 'none ready for block 3')
+
+    def testError(self):
+        """confirm a block too large for the buffer is raised"""
+        with self.assertRaises(ValueError, msg='raised by wait()'):
+            self.sdr.txStream([np.zeros(4*BLOCK_SIZE, np.int16)], BLOCK_SIZE)
+        self.assertEqual(self.pushed, [], 'nothing pushed')
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting tx streaming in module:\n',
+          path.abspath(tx_stream.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()
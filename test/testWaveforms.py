@@ -0,0 +1,91 @@
+"""
+    Using unittest to validate code for waveforms
+    No device is needed, the simulated backend takes the tx data
+    look for #!# lines where corrections are pending
+"""
+from __future__ import print_function
+
+import logging
+
+import unittest
+
+# for numpy operations, there are additional assertTests in the numpy module
+import numpy as np
+import numpy.testing as npt
+
+from pluto import waveforms
+from pluto.pluto_sdr import PlutoSdr
+
+FS = 30.72            # MHz
+N = 0x1000
+
+def toComplex(raw):
+    return raw[0::2] + 1j*raw[1::2].astype(np.float64)
+
+class TestWaveforms(unittest.TestCase):
+
+    def setUp(self):
+        self.longMessage = True  # enables "test != result" in error message
+
+    def tearDown(self):
+        waveforms.clearCache()
+
+    # everything starting test is run, but in no guaranteed order
+    def testMultiTone(self):
+        """confirm tones are fitted to whole cycles within full scale"""
+        raw = waveforms.multiTone([1.0, -2.5], FS, N, level=-1)
+        self.assertEqual(raw.dtype, np.int16, 'raw data')
+        self.assertEqual(len(raw), 2*N, 'interleaved IQ')
+        self.assertLessEqual(np.abs(raw).max(), waveforms.FULL_SCALE,
+                             'no overflow')
+        power = np.abs(np.fft.fft(toComplex(raw)))**2
+        bins = [round(1.0*N/FS), N - round(2.5*N/FS)]
+        self.assertGreater(power[bins].sum()/power.sum(), 0.9999,
+                           'no leakage, whole cycles')
+        self.assertIs(waveforms.multiTone([1.0, -2.5], FS, N, level=-1), raw,
+                      'cached')
+        self.assertFalse(raw.flags.writeable, 'cached copy protected')
+
+    def testToneBlocks(self):
+        """confirm phase continues across blocks"""
+        blocks = waveforms.toneBlocks([1.234, -0.5], FS, 1000, phases=[0, 45])
+        joined = np.concatenate([next(blocks) for _ in range(4)])
+        whole = waveforms.multiTone([1.234, -0.5], FS, 4000, phases=[0, 45],
+                                    fit=False)
+        npt.assert_allclose(joined, whole, atol=1, err_msg='continuous')
+
+    def testChirpNoise(self):
+        """confirm the chirp peak and the noise rms level"""
+        raw = waveforms.chirp(-5, 5, FS, N, level=-6)
+        self.assertEqual(len(raw), 2*N, 'interleaved IQ')
+        npt.assert_allclose(np.abs(toComplex(raw)).max(),
+                            waveforms.FULL_SCALE*10**(-6/20.0), rtol=1e-3,
+                            err_msg='peak level')
+        raw = waveforms.noise(0x10000, level=-20, seed=1)
+        rms = np.sqrt(np.mean(np.abs(toComplex(raw))**2))
+        npt.assert_allclose(20*np.log10(rms/waveforms.FULL_SCALE), -20,
+                            atol=0.1, err_msg='rms level')
+        self.assertIs(waveforms.noise(0x10000, level=-20, seed=1), raw,
+                      'seeded noise is cached')
+        self.assertFalse(np.array_equal(waveforms.noise(100),
+                                        waveforms.noise(100)),
+                         'unseeded noise differs')
+
+    def testWriteTx(self):
+        """confirm a waveform is accepted by writeTx"""
+        with PlutoSdr('sim:') as sdr:
+            raw = waveforms.multiTone(1.0, FS, N)
+            self.assertEqual(sdr.writeTx(raw), 4*N, 'bytes written')
+            sdr.writeTx(None)
+
+if __name__=='__main__':
+    from os import path
+    import sys
+    # show what is being tested and from where
+    print('\nTesting waveforms in module:\n',
+          path.abspath(waveforms.__file__))
+
+    logging.basicConfig(
+        format='%(module)-12s.%(funcName)-12s:%(levelname)s - %(message)s',
+        stream=sys.stdout, level=logging.ERROR)
+    unittest.main()